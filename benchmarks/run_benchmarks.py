@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks of poisk's main search paths, over synthetic HTML, XML and JSON haystacks of several sizes.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scales 1000 100000 --repeat 5 --json results.json
+
+For each benchmark and scale, this prints the best wall time over `--repeat` runs, the throughput (size of the haystack's text
+divided by that time), and the peak memory allocated during one more run, as measured by `tracemalloc`. `--json` also saves these
+figures, so that they can be compared across releases.
+"""
+
+# standards
+import argparse
+from functools import partial
+import json
+from pathlib import Path
+import random
+import sys
+import tempfile
+from time import perf_counter
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple
+
+# 3rd parties
+import lxml.etree as ET
+
+# poisk
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from poisk import ManyFound, many, one  # noqa: E402  # pylint: disable=wrong-import-position
+
+
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+
+
+class Haystacks(NamedTuple):
+    records: List[Dict[str, Any]]
+    data: Dict[str, Any]
+    json_bytes: bytes
+    json_path: Path
+    html_text: str
+    html: Any
+    xml_text: str
+    xml: Any
+
+
+class Benchmark(NamedTuple):
+    name: str
+    run: Callable[[Haystacks], Any]
+    size: Callable[[Haystacks], int]
+
+
+def make_haystacks(scale: int, directory: Path) -> Haystacks:
+    rng = random.Random(scale)
+    records = [
+        {
+            "id": i,
+            "name": f"record {i}",
+            "price": round(rng.uniform(0, 100), 2),
+            "tags": [f"tag{rng.randrange(20)}" for _ in range(3)],
+        }
+        for i in range(scale)
+    ]
+    data = {"payload": {"results": records, "total": len(records)}}
+    json_bytes = json.dumps(data).encode("UTF-8")
+    json_path = directory / f"data-{scale}.json"
+    json_path.write_bytes(json_bytes)
+    rows = "".join(
+        f'<tr id="r{r["id"]}"><td class="name">{r["name"]}</td><td class="price">{r["price"]}</td></tr>' for r in records
+    )
+    html_text = f"<html><body><h1>Results</h1><table>{rows}</table></body></html>"
+    items = "".join(f'<item id="{r["id"]}"><price>{r["price"]}</price></item>' for r in records)
+    xml_text = f"<items>{items}</items>"
+    return Haystacks(records, data, json_bytes, json_path, html_text, ET.HTML(html_text), xml_text, ET.XML(xml_text))
+
+
+def expect_many_found(function: Callable[..., Any], *args, **kwargs) -> None:
+    try:
+        function(*args, **kwargs)
+    except ManyFound:
+        return
+    raise AssertionError("ManyFound was not raised")
+
+
+BENCHMARKS = [
+    # regexes
+    Benchmark("many.re", lambda h: many.re(r'id="r(\d+)"', h.html_text), lambda h: len(h.html_text)),
+    Benchmark("one.re ManyFound", lambda h: expect_many_found(one.re, r"<tr", h.html_text), lambda h: len(h.html_text)),
+    Benchmark("many.re over file", lambda h: many.re(r'"id": (\d+)', h.json_path), lambda h: len(h.json_bytes)),
+    # etree
+    Benchmark("many.etree CSS", lambda h: many.etree("tr td.price", h.html), lambda h: len(h.html_text)),
+    Benchmark("many.etree XPath", lambda h: many.etree("//tr/td[@class='price']/text()", h.html), lambda h: len(h.html_text)),
+    Benchmark("one.etree ManyFound", lambda h: expect_many_found(one.etree, "td", h.html), lambda h: len(h.html_text)),
+    Benchmark("many.etree XML", lambda h: many.etree("//item/@id", h.xml), lambda h: len(h.xml_text)),
+    # pods
+    Benchmark("many.pods []", lambda h: many.pods("payload.results[].price", h.data), lambda h: len(h.json_bytes)),
+    Benchmark("many.pods [][]", lambda h: many.pods("payload.results[].tags[]", h.data), lambda h: len(h.json_bytes)),
+    Benchmark(
+        "one.pods ManyFound",
+        lambda h: expect_many_found(one.pods, "payload.results[].id", h.data),
+        lambda h: len(h.json_bytes),
+    ),
+    Benchmark("many.pods_array", lambda h: many.pods_array("payload.results[].price", h.data), lambda h: len(h.json_bytes)),
+    Benchmark("many.pods over JSON", lambda h: many.pods("payload.results[].id", h.json_bytes), lambda h: len(h.json_bytes)),
+    Benchmark("one.pods over file", lambda h: one.pods("payload.total", h.json_path), lambda h: len(h.json_bytes)),
+    # filter
+    Benchmark("many.filter", lambda h: many.filter(lambda r: r["price"] > 50, h.records), lambda h: len(h.json_bytes)),
+    Benchmark("one.filter ManyFound", lambda h: expect_many_found(one.filter, bool, h.records), lambda h: len(h.json_bytes)),
+]
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def run(scales: List[int], repeat: int, selected: List[str]) -> Iterator[Dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            haystacks = make_haystacks(scale, Path(directory))
+            for benchmark in BENCHMARKS:
+                if selected and not any(name in benchmark.name for name in selected):
+                    continue
+                size = benchmark.size(haystacks)
+                figures = measure(partial(benchmark.run, haystacks), repeat)
+                yield {
+                    "benchmark": benchmark.name,
+                    "scale": scale,
+                    "haystack_bytes": size,
+                    "mb_per_second": size / figures["seconds"] / 1e6,
+                    **figures,
+                }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="numbers of records in the haystacks")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs per benchmark, the best one is reported")
+    parser.add_argument("--only", nargs="*", default=[], help="only run benchmarks whose name contains one of these strings")
+    parser.add_argument("--json", type=Path, help="also save the results to this file")
+    args = parser.parse_args()
+    results = []
+    print(f"{'benchmark':<24} {'scale':>8} {'time (ms)':>11} {'MB/s':>9} {'peak memory (KB)':>17}")
+    for result in run(args.scales, args.repeat, args.only):
+        print(
+            f"{result['benchmark']:<24} {result['scale']:>8} {result['seconds'] * 1000:>11.2f}"
+            f" {result['mb_per_second']:>9.1f} {result['peak_bytes'] / 1024:>17.1f}",
+            flush=True,
+        )
+        results.append(result)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), "UTF-8")
+
+
+if __name__ == "__main__":
+    main()
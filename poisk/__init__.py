@@ -1,16 +1,42 @@
 #!/usr/bin/env python3
 
-from .exceptions import PoiskException, ManyFound, NotFound
-from .pods import pods_search
+from .caches import cache_clear, cache_info, cache_warm
+from .exceptions import PoiskException, ManyFound, NotFound, ResultTypeError
+from .extract import Extractor, Field, extract
+from .pods import PodsIndex, PodsQuery, PodsQuerySet, compile_pods, pods_get, pods_search
+from .xpath import XPathQuery, compile_xpath, xpath_search
 
+from . import aio
+from . import batch
+from . import instrumentation
+from . import iter
 from . import many
 from . import one
 
 __all__ = [
+    "cache_clear",
+    "cache_info",
+    "cache_warm",
     "PoiskException",
     "ManyFound",
     "NotFound",
+    "ResultTypeError",
+    "Extractor",
+    "Field",
+    "extract",
+    "PodsIndex",
+    "PodsQuery",
+    "PodsQuerySet",
+    "compile_pods",
+    "pods_get",
     "pods_search",
+    "XPathQuery",
+    "compile_xpath",
+    "xpath_search",
+    "aio",
+    "batch",
+    "instrumentation",
+    "iter",
     "many",
     "one",
 ]
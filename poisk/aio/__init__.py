@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+
+"""
+Coroutine versions of the `one` and `many` search functions, for use in asyncio event loops.
+
+    >>> title = await poisk.aio.one.etree("h1", document)
+
+They take the same arguments, and return the same values or raise the same exceptions, as their synchronous counterparts. Searches
+over small haystacks are run inline, since handing them over to another thread would cost more than it saves, but searches over
+large haystacks are run in an executor, so that they don't block the event loop. See the `offload` module.
+"""
+
+from .offload import INLINE_SIZE_LIMIT, set_executor, set_inline_size_limit
+
+from . import many
+from . import one
+
+__all__ = [
+    "INLINE_SIZE_LIMIT",
+    "set_executor",
+    "set_inline_size_limit",
+    "many",
+    "one",
+]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+"""
+Coroutine versions of the functions in `poisk.many`, see `poisk.aio`.
+"""
+
+# standards
+from typing import Any, Callable, Iterable, Optional
+
+# poisk
+from .. import many as _many
+from ..pods import SearchablePods
+from ..types import RegexHaystack, RegexType
+from .offload import offload
+
+
+async def re(needle: RegexType, haystack: RegexHaystack, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.many.re`.
+    """
+    return await offload(_many.re, needle, haystack, parse, **kwargs)
+
+
+async def re_groups(needle: RegexType, haystack: RegexHaystack, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.many.re_groups`.
+    """
+    return await offload(_many.re_groups, needle, haystack, parse, **kwargs)
+
+
+async def etree(needle: str, haystack: Any, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.many.etree`.
+    """
+    return await offload(_many.etree, needle, haystack, parse, **kwargs)
+
+
+async def pods(needle: str, haystack: SearchablePods, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.many.pods`.
+    """
+    return await offload(_many.pods, needle, haystack, parse, **kwargs)
+
+
+async def filter(needle: Callable[[Any], object], haystack: Iterable[Any], parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.many.filter`.
+    """
+    return await offload(_many.filter, needle, haystack, parse, **kwargs)
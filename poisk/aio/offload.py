@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Deciding whether a search should be run inline in the event loop, or offloaded to an executor.
+
+The decision is based on `haystacks.estimate_size`. The executor defaults to the event loop's default executor, a thread pool,
+which works well for etree and regex searches since lxml and `re` release the GIL for much of their work. A process pool can be set
+with `set_executor`, provided the haystacks and the `parse` functions can be pickled.
+"""
+
+# standards
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, Optional
+
+# poisk
+from ..haystacks import estimate_size
+
+
+# Haystacks estimated to be up to this many bytes are searched inline, by default
+INLINE_SIZE_LIMIT = 64 * 1024
+
+
+_executor: Optional[Executor] = None
+
+_inline_size_limit = INLINE_SIZE_LIMIT
+
+
+def set_executor(executor: Optional[Executor]) -> None:
+    """
+    Sets the executor that large searches are offloaded to. None means the event loop's default executor.
+    """
+    global _executor  # pylint: disable=global-statement,invalid-name
+    _executor = executor
+
+
+def set_inline_size_limit(limit: int) -> None:
+    """
+    Sets the size, as estimated by `haystacks.estimate_size`, above which searches are offloaded to the executor. 0 means that all
+    searches but those over empty haystacks are offloaded, and -1 that they all are.
+    """
+    global _inline_size_limit  # pylint: disable=global-statement,invalid-name
+    _inline_size_limit = limit
+
+
+async def offload(function: Callable[..., Any], needle: Any, haystack: Any, *args, **kwargs) -> Any:
+    """
+    Returns `function(needle, haystack, *args, **kwargs)`, which is run in the executor if `haystack` is large.
+    """
+    if estimate_size(haystack, _inline_size_limit + 1) <= _inline_size_limit:
+        return function(needle, haystack, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(function, needle, haystack, *args, **kwargs))
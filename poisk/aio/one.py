@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""
+Coroutine versions of the functions in `poisk.one`, see `poisk.aio`.
+"""
+
+# standards
+from typing import Any, Callable, Iterable, Optional
+
+# poisk
+from .. import one as _one
+from ..pods import SearchablePods
+from ..types import RegexHaystack, RegexType
+from .offload import offload
+
+
+async def re(needle: RegexType, haystack: RegexHaystack, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.one.re`.
+    """
+    return await offload(_one.re, needle, haystack, parse, **kwargs)
+
+
+async def re_groups(needle: RegexType, haystack: RegexHaystack, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.one.re_groups`.
+    """
+    return await offload(_one.re_groups, needle, haystack, parse, **kwargs)
+
+
+async def etree(needle: str, haystack: Any, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.one.etree`.
+    """
+    return await offload(_one.etree, needle, haystack, parse, **kwargs)
+
+
+async def attrib(needle: str, haystack: Any, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.one.attrib`. This is always run inline, since it only looks up an attribute of `haystack`.
+    """
+    return _one.attrib(needle, haystack, parse, **kwargs)
+
+
+async def pods(needle: str, haystack: SearchablePods, parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.one.pods`.
+    """
+    return await offload(_one.pods, needle, haystack, parse, **kwargs)
+
+
+async def filter(needle: Callable[[Any], object], haystack: Iterable[Any], parse: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    See `poisk.one.filter`.
+    """
+    return await offload(_one.filter, needle, haystack, parse, **kwargs)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Running the same extraction over many haystacks in parallel.
+
+    >>> batch.map({"title": "h1", "links": Field("a/@href", many=True)}, documents, load=lxml.html.fromstring)
+    [{"title": <Element h1>, "links": [...]}, NotFound("h1"), ...]
+
+The `searches` are compiled into an `Extractor` once, and sent to each worker process once, when the pool starts, rather than with
+every haystack. Haystacks are dispatched to the workers in chunks, and the results come back in the same order as the haystacks.
+
+Conversely, `etree_many_concurrent` runs many needles over the same, large, document, using threads.
+"""
+
+# standards
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+# poisk
+from . import many
+from .exceptions import PoiskException
+from .extract import Extractor, Spec
+
+
+Result = Union[Dict[str, Any], PoiskException]
+
+# How many chunks each worker gets, on average, when `chunksize` isn't specified. More chunks balance the load better when some
+# haystacks take longer than others, fewer chunks mean less overhead.
+CHUNKS_PER_WORKER = 4
+
+
+def map(
+    searches: Union[Spec, Extractor],
+    haystacks: Iterable[Any],
+    *,
+    workers: Optional[int] = None,
+    executor: str = "process",
+    chunksize: Optional[int] = None,
+    load: Optional[Callable[[Any], Any]] = None,
+) -> List[Result]:
+    """
+    Extracts `searches` (see `Extractor`) from each of `haystacks`, using a pool of `workers` processes or threads (by default, as
+    many as there are CPUs). Returns a list with, for each haystack in turn, either the dict of extracted values, or the `NotFound`
+    or `ManyFound` exception that the extraction raised. Any other exception is raised.
+
+    If `load` is given, it is called on each haystack, in the worker, before extracting from it. This is how etree haystacks can be
+    sent to worker processes, since lxml documents can't be pickled: send the raw documents instead, and use e.g.
+    `load=lxml.html.fromstring`.
+
+    With `executor="process"`, the searches (including any `parse` functions), `load` and the haystacks must all be picklable. The
+    haystack attached to the returned exceptions is always the haystack as given, before `load`, so that it can be sent back.
+    """
+    extractor = searches if isinstance(searches, Extractor) else Extractor(searches)
+    haystacks = list(haystacks)
+    workers = workers or os.cpu_count() or 1
+    pool: Executor
+    if executor == "process":
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(extractor, load))
+        function = _extract_in_worker
+    elif executor == "thread":
+        pool = ThreadPoolExecutor(workers)
+        function = partial(_extract, extractor, load)
+    else:
+        raise ValueError(f"Unknown executor: {executor!r}")
+    if chunksize is None:
+        chunksize = max(1, len(haystacks) // (workers * CHUNKS_PER_WORKER))
+    with pool:
+        # `chunksize` is ignored by thread pools, for which there is no overhead per haystack to amortise
+        return list(pool.map(function, haystacks, chunksize=chunksize))
+
+
+def etree_many_concurrent(
+    needles: Iterable[str],
+    haystack: Any,
+    parse: Optional[Callable[[Any], Any]] = None,
+    *,
+    max_workers: Optional[int] = None,
+    allow_mismatch: bool = False,
+    **kwargs,
+) -> List[List[Any]]:
+    """
+    Returns `[many.etree(needle, haystack, ...) for needle in needles]`, but with the searches spread over a pool of `max_workers`
+    threads. lxml releases the GIL while evaluating XPath expressions, and each thread uses its own compiled expressions (see the
+    `xpath` module), so the searches do run in parallel. If any of the searches raises an exception, the first one is raised.
+    """
+    with ThreadPoolExecutor(max_workers) as pool:
+        return list(
+            pool.map(
+                lambda needle: many.etree(needle, haystack, parse, allow_mismatch=allow_mismatch, **kwargs),
+                needles,
+            )
+        )
+
+
+def _extract(extractor: Extractor, load: Optional[Callable[[Any], Any]], haystack: Any) -> Result:
+    try:
+        return extractor.extract(haystack if load is None else load(haystack))
+    except PoiskException as error:
+        error.haystack = haystack
+        return error
+
+
+# Set in each worker process by `_init_worker`, so that the extractor is only pickled once per worker
+_worker_extract: Optional[Callable[[Any], Result]] = None
+
+
+def _init_worker(extractor: Extractor, load: Optional[Callable[[Any], Any]]) -> None:
+    global _worker_extract  # pylint: disable=global-statement
+    _worker_extract = partial(_extract, extractor, load)
+
+
+def _extract_in_worker(haystack: Any) -> Result:
+    return _worker_extract(haystack)  # type: ignore[misc]
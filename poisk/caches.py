@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+"""
+Statistics and control over all of poisk's caches of compiled needles, for regexes, etree needles and pods needles.
+"""
+
+# standards
+from typing import Any, Dict, Iterable, Union
+
+# poisk
+from . import regex, xpath
+from .pods import compile_pods
+
+
+def cache_info() -> Dict[str, Any]:
+    """
+    Hit/miss statistics for each cache, as `functools._CacheInfo` named tuples.
+    """
+    return {
+        "re": regex.cache_info(),
+        "etree": xpath.cache_info(),
+        "pods": compile_pods.cache_info(),
+    }
+
+
+def cache_clear() -> None:
+    regex.cache_clear()
+    xpath.cache_clear()
+    compile_pods.cache_clear()
+
+
+def cache_warm(
+    *,
+    re: Iterable[Union[str, bytes]] = (),
+    etree: Iterable[str] = (),
+    pods: Iterable[str] = (),
+    flags: int = 0,
+) -> None:
+    """
+    Compiles the given needles ahead of time, e.g. at startup, so that the first searches don't have to. `flags` apply to the `re`
+    needles.
+    """
+    regex.cache_warm(re, flags)
+    for needle in etree:
+        xpath.compile_xpath(needle)
+    for needle in pods:
+        compile_pods(needle)
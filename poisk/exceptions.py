@@ -1,21 +1,114 @@
 #!/usr/bin/env python3
 
+# standards
+from collections.abc import Collection, Mapping, Sequence, Set as AbstractSet
+import reprlib
+
+# How many characters of the haystack's repr we show in exception messages
+HAYSTACK_REPR_LENGTH = 100
+
+
+class _HaystackRepr(reprlib.Repr):
+    """
+    Like `repr`, but gives up on containers after a few elements and levels of nesting, so that it never walks more than a bounded
+    portion of the haystack. Unlike `reprlib.Repr`, this keeps dict keys in their original order, and it also abbreviates instances
+    of subclasses of the builtin containers, and other mappings, sequences and sets, instead of building their complete repr.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 3
+        self.maxdict = self.maxlist = self.maxtuple = self.maxset = self.maxfrozenset = 10
+        self.maxstring = self.maxother = HAYSTACK_REPR_LENGTH
+
+    def repr1(self, x, level):
+        # `reprlib.Repr` picks the method to call from the name of the object's class, so that e.g. an `OrderedDict` would go to
+        # `repr_instance`, which calls the builtin `repr`
+        if isinstance(x, (str, bytes, bytearray)):
+            return super().repr1(x, level)
+        if isinstance(x, Mapping):
+            return self.repr_dict(x, level)
+        if isinstance(x, tuple):
+            return self.repr_tuple(x, level)
+        if isinstance(x, Sequence):
+            return self.repr_list(x, level)
+        if isinstance(x, frozenset):
+            return self.repr_frozenset(x, level)
+        if isinstance(x, AbstractSet):
+            return self.repr_set(x, level)
+        return super().repr1(x, level)
+
+    def repr_instance(self, x, level):
+        # other containers, e.g. dict views or NumPy arrays, are also abbreviated, after their class name. Any other
+        # object's repr is assumed to be small, and is only truncated
+        if isinstance(x, Collection):
+            return f"{x.__class__.__name__}({self._repr_iterable(x, level, '[', ']', self.maxlist)})"
+        return super().repr_instance(x, level)
+
+    def repr_dict(self, x, level):
+        if not x:
+            return "{}"
+        if level <= 0:
+            return "{...}"
+        pieces = []
+        for index, (key, value) in enumerate(x.items()):
+            if index >= self.maxdict:
+                pieces.append("...")
+                break
+            pieces.append(f"{self.repr1(key, level - 1)}: {self.repr1(value, level - 1)}")
+        return "{" + ", ".join(pieces) + "}"
+
+
+_haystack_repr = _HaystackRepr().repr
+
 
 class PoiskException(ValueError):
+    """
+    The message is only composed when the exception is displayed, since these exceptions are often raised and caught without ever
+    being displayed, and the haystack can be huge.
+    """
+
     def __init__(self, needle, haystack):
-        super().__init__(self._compose_message(needle, haystack))
+        super().__init__()
         self.needle = needle
         self.haystack = haystack
+        self._message = None
+
+    @property
+    def message(self) -> str:
+        if self._message is None:
+            self._message = self._compose_message(self.needle, self.haystack)
+        return self._message
+
+    @property  # type: ignore[override]
+    def args(self):
+        return (self.message,)
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.message!r})"
+
+    def __reduce__(self):
+        return (self.__class__, (self.needle, self.haystack))
 
     @staticmethod
     def _compose_message(needle, haystack):
         message = repr(needle)
-        if isinstance(haystack, (str, list, tuple, set, dict)):
+        if isinstance(haystack, str):
+            if len(haystack) > HAYSTACK_REPR_LENGTH:
+                # Every character in a str takes up at least one character in its repr, so we only drop what wouldn't be displayed
+                haystack = haystack[:HAYSTACK_REPR_LENGTH] + haystack[-HAYSTACK_REPR_LENGTH:]
             haystack_repr = repr(haystack)
-            if len(haystack_repr) > 100:
-                haystack_repr = haystack_repr[:50] + "…" + haystack_repr[-50:]
-            message += " in " + haystack_repr
-        return message
+        elif isinstance(haystack, (Mapping, Sequence, AbstractSet)) and not isinstance(haystack, (bytes, bytearray)):
+            haystack_repr = _haystack_repr(haystack)
+        else:
+            return message
+        if len(haystack_repr) > HAYSTACK_REPR_LENGTH:
+            half = HAYSTACK_REPR_LENGTH // 2
+            haystack_repr = haystack_repr[:half] + "…" + haystack_repr[-half:]
+        return message + " in " + haystack_repr
 
 
 class NotFound(PoiskException):
@@ -24,3 +117,41 @@ class NotFound(PoiskException):
 
 class ManyFound(PoiskException):
     pass
+
+
+class ResultTypeError(TypeError):
+    """
+    Raised by searches given a `type` (see the `validation` module), when some of the results don't match it. `mismatches` lists
+    all of them, as `validation.Mismatch` tuples.
+    """
+
+    def __init__(self, expected, mismatches):
+        super().__init__()
+        self.expected = expected
+        self.mismatches = mismatches
+
+    @property  # type: ignore[override]
+    def args(self):
+        return (str(self),)
+
+    def __str__(self):
+        if len(self.mismatches) == 1 and self.mismatches[0][:2] == (0, ()):
+            return f"Expected {self.mismatches[0].expected}, found {self.mismatches[0].found}"
+        plural = "es" if len(self.mismatches) > 1 else ""
+        return f"{len(self.mismatches)} mismatch{plural} with {self.expected}: " + "; ".join(
+            f"result {mismatch.result}{_format_path(mismatch.path)}: expected {mismatch.expected}, found {mismatch.found}"
+            for mismatch in self.mismatches
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({str(self)!r})"
+
+    def __reduce__(self):
+        return (self.__class__, (self.expected, self.mismatches))
+
+
+def _format_path(path):
+    if not path:
+        return ""
+    steps = "".join(f".{step}" if isinstance(step, str) else f"[{step!r}]" for step in path)
+    return " at " + (steps[1:] if steps.startswith(".") else steps)
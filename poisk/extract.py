@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+"""
+Extraction of several fields from the same haystack in one call.
+
+    >>> extract({"total": "payload.total", "ids": Field("payload.results[].id", many=True)}, data)
+    {"total": 3, "ids": [1, 2, 3]}
+
+Each field follows the same rules as the corresponding `one` or `many` function, and raises the same `NotFound` and `ManyFound`
+exceptions. But rather than searching the haystack once per field, all pods needles are compiled into a `PodsQuerySet` and
+evaluated in a single traversal of the haystack. Etree needles are evaluated using their cached compiled XPath queries.
+"""
+
+# standards
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Union
+
+# poisk
+from . import iter as _iter, many as _many, one as _one
+from .pods import PodsQuerySet
+from .xpath import COMPILE_OPTIONS, compile_xpath
+
+
+class Field(NamedTuple):
+    """
+    A field to extract. `many` selects whether it behaves like `many.*` (a list is returned) or `one.*` (a single value). The other
+    attributes are the same as the kwargs of these functions. `kind` only applies to etree needles.
+    """
+
+    needle: str
+    many: bool = False
+    parse: Optional[Callable[[Any], Any]] = None
+    allow_mismatch: bool = False
+    allow_many: bool = False
+    allow_duplicates: bool = False
+    kind: Optional[str] = None
+
+
+Spec = Mapping[str, Union[str, Field]]
+
+
+class Extractor:
+    """
+    A `spec` that's been compiled once, and can then be extracted from any number of haystacks.
+    """
+
+    def __init__(self, spec: Spec):
+        self.spec = spec
+        self.fields: Dict[str, Field] = {
+            name: field if isinstance(field, Field) else Field(field)  # plain needles are for `one`
+            for name, field in spec.items()
+        }
+        self._pods: Optional[PodsQuerySet] = None  # compiled on first use, since we don't know yet if these are pods needles
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.spec!r})"
+
+    def __reduce__(self):
+        # compiled XPath objects can't be pickled, but we can always compile them again
+        return (self.__class__, (self.spec,))
+
+    def extract(self, haystack: Any, **kwargs) -> Dict[str, Any]:
+        """
+        Returns a dict mapping each field name to its extracted value. If `haystack` has an `xpath` method, the needles are
+        etree needles, and `kwargs` are passed on to the XPath queries. Otherwise they're pods needles, and `haystack` can also be
+        JSON text (see `haystacks.BufferSource`).
+        """
+        if hasattr(haystack, "xpath"):
+            all_results = self._search_etree(haystack, **kwargs)
+        else:
+            if kwargs:
+                raise TypeError(f"Unexpected kwargs for pods extraction: {', '.join(kwargs)}")
+            if self._pods is None:
+                self._pods = PodsQuerySet(field.needle for field in self.fields.values())
+            all_results = self._pods.search(haystack)
+        return {name: _finish(field, haystack, results) for (name, field), results in zip(self.fields.items(), all_results)}
+
+    def _search_etree(self, haystack: Any, **kwargs) -> List[List[Any]]:
+        # A union of all XPath queries would be a single pass, but lxml would then give us no way to tell which query selected
+        # which node. So we evaluate each field's own compiled query instead.
+        options = {name: kwargs.pop(name) for name in COMPILE_OPTIONS if name in kwargs}
+        return [compile_xpath(field.needle, field.kind, **options).search(haystack, **kwargs) for field in self.fields.values()]
+
+
+def extract(spec: Spec, haystack: Any, **kwargs) -> Dict[str, Any]:
+    """
+    Extracts all fields in `spec` from `haystack`. See `Extractor.extract`.
+    """
+    return Extractor(spec).extract(haystack, **kwargs)
+
+
+def _finish(field: Field, haystack: Any, results: List[Any]) -> Any:
+    # pylint: disable=protected-access
+    if field.many:
+        return _many._many(field.needle, haystack, results, field.parse, allow_mismatch=field.allow_mismatch)
+    return _one._one(
+        field.needle,
+        haystack,
+        _iter._iter(field.needle, haystack, results, field.parse, allow_mismatch=field.allow_mismatch),
+        field.allow_many,
+        field.allow_duplicates,
+    )
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Helpers for haystacks that aren't in-memory Python objects, but raw bytes: a `bytes`-like object, a binary file, or a path to a
+file. Files are memory-mapped where possible, so that they don't have to be read into memory.
+
+Also, `estimate_size`, for any kind of haystack.
+"""
+
+# standards
+from contextlib import contextmanager
+import io
+from itertools import islice
+import mmap
+import os
+from typing import IO, Any, Iterator, Union
+
+
+BufferSource = Union[bytes, bytearray, memoryview, mmap.mmap, "os.PathLike[str]", IO[bytes]]
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+# Everything that `is_buffer_source` accepts. Files must be actual file objects (e.g. from `open`, or an `io.BytesIO`), so that an
+# in-memory haystack that happens to have a `read` attribute isn't mistaken for one.
+_BUFFER_SOURCE_TYPES = (*BUFFER_TYPES, io.IOBase, os.PathLike)
+
+# The haystacks most searches are given, which `is_buffer_source` can then turn down with a single lookup
+_IN_MEMORY_TYPES = frozenset((str, dict, list, tuple))
+
+# How many bytes of text a node in an element tree, or a value in a pods haystack, counts for in `estimate_size`
+NODE_SIZE = 64
+
+
+def is_buffer_source(haystack: Any) -> bool:
+    """
+    Whether `haystack` is a `BufferSource`, rather than an in-memory data structure or document.
+    """
+    if type(haystack) in _IN_MEMORY_TYPES:
+        return False
+    return isinstance(haystack, _BUFFER_SOURCE_TYPES)
+
+
+@contextmanager
+def open_buffer(source: BufferSource) -> Iterator[Any]:
+    """
+    Yields a bytes-like object holding the contents of `source`, which can be searched with `re` or decoded with `json`. Paths and
+    files are memory-mapped if possible, and the map is closed on exit.
+    """
+    if isinstance(source, BUFFER_TYPES):
+        yield source
+    elif isinstance(source, os.PathLike):
+        with open(source, "rb") as file:
+            with _map_file(file) as buffer:
+                yield buffer
+    else:
+        try:
+            source.fileno()
+        except (AttributeError, OSError):  # io.UnsupportedOperation is an OSError
+            # e.g. an `io.BytesIO`, it's already in memory anyway
+            data = source.read()
+            yield data.encode("UTF-8") if isinstance(data, str) else data
+        else:
+            with _map_file(source) as buffer:
+                yield buffer
+
+
+def estimate_size(haystack: Any, limit: int) -> int:
+    """
+    Returns a rough estimate of how many bytes of text searching `haystack` will have to go through, or `limit` if it's larger than
+    that. Trees and containers are counted at `NODE_SIZE` per node, and only up to the limit, so that the estimate is cheap even for
+    huge haystacks. Haystacks whose size can't be known without consuming them, such as files or iterators, are assumed to be large.
+    """
+    if isinstance(haystack, (str, *BUFFER_TYPES)):
+        size = len(haystack)
+    elif isinstance(haystack, os.PathLike):
+        size = os.stat(haystack).st_size
+    elif hasattr(haystack, "iter") and hasattr(haystack, "xpath"):
+        # an lxml element or tree
+        size = NODE_SIZE * sum(1 for _ in islice(haystack.iter(), limit // NODE_SIZE + 1))
+    elif isinstance(haystack, (dict, list, tuple)):
+        size = NODE_SIZE * _count_nodes(haystack, limit // NODE_SIZE + 1)
+    else:
+        size = limit
+    return min(size, limit)
+
+
+def _count_nodes(haystack: Any, limit: int) -> int:
+    # a stack of iterators rather than of nodes, so that we don't copy huge lists just to count their first few elements
+    count = 0
+    stack = [iter((haystack,))]
+    while stack:
+        for node in stack[-1]:
+            count += 1
+            if count >= limit:
+                return count
+            if isinstance(node, dict):
+                stack.append(iter(node.values()))
+                break
+            if isinstance(node, (list, tuple)):
+                stack.append(iter(node))
+                break
+        else:
+            stack.pop()
+    return count
+
+
+@contextmanager
+def _map_file(file: IO) -> Iterator[Any]:
+    if os.fstat(file.fileno()).st_size == 0:
+        yield b""  # can't mmap an empty file
+    else:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""
+Opt-in instrumentation of the search functions in `one` and `many`.
+
+    >>> with instrumentation.instrumented() as stats:
+    ...     run_parsers()
+    >>> stats.dump()
+
+When no listener is registered, the search functions are the plain, uninstrumented ones, so there is no overhead at all. As soon as
+one is registered (with `add_listener`, or by `instrumented`), every function in `one` and `many` is replaced with a wrapper that
+times each call and sends a `SearchEvent` to every listener. The original functions are put back once the last listener is removed.
+
+Since the functions are swapped in their modules, only calls that look them up in the module, e.g. `one.re(...)`, are instrumented.
+Functions imported by name beforehand (`from poisk.one import re`) are not.
+"""
+
+# standards
+from contextlib import contextmanager
+from functools import wraps
+import sys
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+# poisk
+from . import many, one, regex, xpath
+from .exceptions import NotFound
+from .haystacks import estimate_size
+from .pods import compile_pods
+
+
+# Haystacks are only measured up to this size (see `haystacks.estimate_size`), to bound the cost of measuring them
+SIZE_ESTIMATE_LIMIT = 1 << 20
+
+# The instrumented functions, with the cache that each of them uses, if any
+SEARCH_FUNCTIONS: Dict[Any, Dict[str, Optional[Callable[[], Any]]]] = {
+    one: {
+        "re": regex.cache_info,
+        "re_groups": regex.cache_info,
+        "etree": xpath.cache_info,
+        "pods": compile_pods.cache_info,
+        "filter": None,
+    },
+    many: {
+        "re": regex.cache_info,
+        "re_groups": regex.cache_info,
+        "etree": xpath.cache_info,
+        "pods": compile_pods.cache_info,
+        "pods_array": compile_pods.cache_info,
+        "filter": None,
+    },
+}
+
+
+class SearchEvent(NamedTuple):
+    """
+    A single call to a search function. `kind` is e.g. "one.re". `result_count` is 0 if the search raised `NotFound`, and None if
+    it raised any other exception, in which case `error` is that exception's class. `cache_hit` is None if the search doesn't use a
+    cache; since caches are shared between threads, it can be wrong when other threads are searching at the same time.
+    """
+
+    kind: str
+    needle: Any
+    haystack_size: int
+    result_count: Optional[int]
+    error: Optional[type]
+    wall_time: float
+    cache_hit: Optional[bool]
+
+
+Listener = Callable[[SearchEvent], None]
+
+
+class NeedleStats:
+    """
+    Aggregated statistics for all calls with one needle to one kind of search. `histogram` maps upper bounds of wall times, in
+    microseconds (powers of 2), to the number of calls that took less than that (and more than the previous bound).
+    """
+
+    __slots__ = ("calls", "errors", "results", "total_time", "max_time", "cache_hits", "cache_misses", "histogram")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.results = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.histogram: Dict[int, int] = {}
+
+    def add(self, event: SearchEvent) -> None:
+        self.calls += 1
+        if event.error is not None:
+            self.errors += 1
+        self.results += event.result_count or 0
+        self.total_time += event.wall_time
+        self.max_time = max(self.max_time, event.wall_time)
+        if event.cache_hit is not None:
+            if event.cache_hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        bound = 1 << int(event.wall_time * 1_000_000).bit_length()
+        self.histogram[bound] = self.histogram.get(bound, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Stats:
+    """
+    A listener that aggregates events into a `NeedleStats` per (kind, needle). It can be polled with `snapshot`, or printed with
+    `dump`, e.g. at process exit with `atexit.register(stats.dump)`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._needles: Dict[Tuple[str, Any], NeedleStats] = {}
+
+    def __call__(self, event: SearchEvent) -> None:
+        key = (event.kind, event.needle)
+        with self._lock:
+            needle_stats = self._needles.get(key)
+            if needle_stats is None:
+                needle_stats = self._needles[key] = NeedleStats()
+            needle_stats.add(event)
+
+    def snapshot(self) -> Dict[Tuple[str, Any], Dict[str, Any]]:
+        """
+        Returns a copy of the stats collected so far, as dicts, keyed by (kind, needle).
+        """
+        with self._lock:
+            return {key: needle_stats.as_dict() for key, needle_stats in self._needles.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._needles.clear()
+
+    def dump(self, file: Optional[TextIO] = None) -> None:
+        """
+        Prints one line per (kind, needle), slowest total time first.
+        """
+        file = file or sys.stderr
+        snapshot = sorted(self.snapshot().items(), key=lambda item: -item[1]["total_time"])
+        for (kind, needle), stats in snapshot:
+            print(
+                f"{kind}({needle!r}): {stats['calls']} calls, {stats['errors']} errors, {stats['results']} results,"
+                f" {stats['total_time']:.6f}s total, {stats['max_time']:.6f}s max,"
+                f" cache hits/misses {stats['cache_hits']}/{stats['cache_misses']}, histogram (µs) {stats['histogram']}",
+                file=file,
+            )
+
+
+_listeners: List[Listener] = []
+
+_listeners_lock = threading.Lock()
+
+# maps (module, function name) to the uninstrumented function, while the instrumented ones are in place
+_originals: Dict[Tuple[Any, str], Callable] = {}
+
+
+def add_listener(listener: Listener) -> None:
+    """
+    Registers a callable that will be called with a `SearchEvent` after every search. This enables instrumentation.
+    """
+    with _listeners_lock:
+        if not _listeners:
+            _patch()
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Listener) -> None:
+    """
+    Unregisters `listener`. Once there are no listeners left, instrumentation is disabled.
+    """
+    with _listeners_lock:
+        _listeners.remove(listener)
+        if not _listeners:
+            _unpatch()
+
+
+@contextmanager
+def instrumented(stats: Optional[Stats] = None) -> Iterator[Stats]:
+    """
+    Collects `Stats` for all searches made in the scope of the `with` block (in any thread).
+    """
+    stats = stats if stats is not None else Stats()
+    add_listener(stats)
+    try:
+        yield stats
+    finally:
+        remove_listener(stats)
+
+
+def _patch() -> None:
+    for module, functions in SEARCH_FUNCTIONS.items():
+        for name, cache_info in functions.items():
+            function = getattr(module, name)
+            _originals[module, name] = function
+            setattr(module, name, _instrument(f"{module.__name__.rsplit('.', 1)[-1]}.{name}", function, cache_info))
+
+
+def _unpatch() -> None:
+    for (module, name), function in _originals.items():
+        setattr(module, name, function)
+    _originals.clear()
+
+
+def _instrument(kind: str, function: Callable, cache_info: Optional[Callable[[], Any]]) -> Callable:
+    @wraps(function)
+    def instrumented_function(*args, **kwargs) -> Any:
+        # the needle and haystack can also be passed by keyword, as with the uninstrumented function
+        needle = args[0] if args else kwargs.get("needle")
+        haystack = args[1] if len(args) > 1 else kwargs.get("haystack")
+        cache_before = cache_info() if cache_info is not None else None
+        result_count: Optional[int] = None
+        error: Optional[type] = None
+        start = perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as exception:
+            error = type(exception)
+            if isinstance(exception, NotFound):
+                result_count = 0
+            raise
+        else:
+            if kind.startswith("many."):
+                result_count = len(result)
+            else:
+                result_count = 0 if result is None else 1
+            return result
+        finally:
+            wall_time = perf_counter() - start
+            event = SearchEvent(
+                kind,
+                needle,
+                estimate_size(haystack, SIZE_ESTIMATE_LIMIT),
+                result_count,
+                error,
+                wall_time,
+                _cache_hit(cache_before, cache_info() if cache_info is not None else None),
+            )
+            for listener in list(_listeners):
+                listener(event)
+
+    return instrumented_function
+
+
+def _cache_hit(before: Any, after: Any) -> Optional[bool]:
+    if before is None or after is None:
+        return None
+    if after.misses > before.misses:
+        return False
+    if after.hits > before.hits:
+        return True
+    return None  # e.g. a precompiled regex, which isn't looked up in the cache
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+"""
+Lazy versions of the searches in `many`. Instead of a list, each function returns an iterator over the matches, so that huge result
+sets can be processed in constant memory, and the search can be abandoned as soon as the caller has seen enough.
+
+Like `many`, these functions raise `NotFound` if there are no matches (unless `allow_mismatch` is set). To do so they look for the
+first match before returning, and only the remaining matches are searched for lazily.
+"""
+
+# standards
+from itertools import chain
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Type, TypeVar, overload
+
+# 3rd parties
+from typing_extensions import Literal  # for pre-3.8 pythons
+
+# poisk
+from .exceptions import NotFound
+from .haystacks import BufferSource, is_buffer_source, open_buffer
+from .pods import PodsPath, SearchablePods, compile_pods
+from .regex import compile_regex, findall_value
+from .types import BytesRegexType, RegexHaystack, RegexType, XPathType
+from .validation import TypeSpec
+from .xpath import xpath_search
+
+
+_filter = filter
+
+
+# type annotations used below
+
+T = TypeVar("T")  # pylint: disable=invalid-name
+
+TPrime = TypeVar("TPrime")
+
+
+@overload
+def re(
+    needle: RegexType,
+    haystack: RegexHaystack,
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[str]:
+    """
+    Iterate over all matches of `needle` in `haystack`. If `parse` is None, then we yield str's.
+    """
+
+
+@overload
+def re(
+    needle: RegexType,
+    haystack: RegexHaystack,
+    parse: Callable[[str], T],
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[T]:
+    """
+    When `parse` is not None, then we yield whatever type `parse` returns.
+    """
+
+
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[bytes]:
+    """
+    With a bytes regex, `haystack` must be raw bytes or a file (see `haystacks.BufferSource`), and we yield bytes.
+    Prefer a bytes regex for large files, see `many.re`.
+    """
+
+
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[bytes], T],
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[T]: ...
+
+
+def re(needle, haystack, parse=None, *, allow_mismatch=False, flags=0):
+    return _iter(
+        needle,
+        haystack,
+        _re_matches(needle, haystack, flags),
+        parse,
+        allow_mismatch=allow_mismatch,
+    )
+
+
+@overload
+def re_groups(
+    needle: RegexType,
+    haystack: RegexHaystack,
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[Tuple[str, ...]]: ...
+
+
+@overload
+def re_groups(
+    needle: RegexType,
+    haystack: RegexHaystack,
+    parse: Callable[[Tuple[str, ...]], T],
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[T]: ...
+
+
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[Tuple[bytes, ...]]:
+    """
+    With a bytes regex, `haystack` must be raw bytes or a file (see `haystacks.BufferSource`), and we yield bytes.
+    """
+
+
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[Tuple[bytes, ...]], T],
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> Iterator[T]: ...
+
+
+def re_groups(needle, haystack, parse=None, *, allow_mismatch=False, flags=0):
+    return re(needle, haystack, parse, allow_mismatch=allow_mismatch, flags=flags)
+
+
+re_groups = re  # type: ignore  # noqa
+
+
+@overload
+def etree(
+    needle: str,
+    haystack: XPathType,
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+    **kwargs,
+) -> Iterator[XPathType]:
+    """
+    When `needle` is an XPath/CSS query. If `parse` is None, we yield Elements. See notes at `many.etree`.
+    """
+
+
+@overload
+def etree(
+    needle: str,
+    haystack: XPathType,
+    parse: Callable[[XPathType], T],
+    *,
+    allow_mismatch: bool = False,
+    **kwargs,
+) -> Iterator[T]:
+    """
+    When `parse` is not None, we yield whatever type `parse` returns.
+    """
+
+
+@overload
+def etree(
+    needle: str,
+    haystack: XPathType,
+    parse: Callable[[str], T],
+    *,
+    allow_mismatch: bool = False,
+    **kwargs,
+) -> Iterator[T]:
+    """
+    When `parse` is a callable that accepts a `str`, we yield whatever type `parse` returns.
+    """
+
+
+def etree(needle, haystack, parse=None, *, allow_mismatch=False, **kwargs):
+    # lxml builds the whole list of results anyway, but at least we don't `parse` them all
+    results = xpath_search(needle, haystack, **kwargs)
+    return _iter(
+        needle,
+        haystack,
+        results,
+        parse,
+        allow_mismatch=allow_mismatch,
+    )
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: None = None,
+    allow_mismatch: bool = False,
+) -> Iterator[Any]:
+    """
+    PODS search
+    """
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: Type[T],
+    allow_mismatch: bool = False,
+) -> Iterator[T]:
+    """
+    If you add type=T, then we yield T's
+    """
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: Callable[[Any], T],
+    *,
+    type: None = None,
+    allow_mismatch: bool = False,
+) -> Iterator[T]:
+    """
+    If `parse` is not None, we yield whatever type `parse` returns.
+    """
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: Callable[[T], TPrime],
+    *,
+    type: Type[T],
+    allow_mismatch: bool = False,
+) -> Iterator[TPrime]:
+    """
+    If `type` and `parse` are both set, then `parse` must accept an instance of `type`.
+    """
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: TypeSpec,
+    allow_mismatch: bool = False,
+) -> Iterator[Any]:
+    """
+    If `type` is a richer type spec than a class (see the `validation` module), we can't tell what type the results will be.
+    There's then no `parse` either, since we couldn't check that it accepts the results.
+    """
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: Optional[TypeSpec] = None,
+    allow_mismatch: bool = False,
+    with_paths: Literal[True],
+) -> Iterator[Tuple[PodsPath, Any]]:
+    """
+    If `with_paths` is set, we yield `(path, value)` pairs, see `pods.search_paths`.
+    Passing a `parse` as well raises a `TypeError`, since it would be given the pairs.
+    """
+
+
+def pods(needle, haystack, parse=None, *, type=None, allow_mismatch=False, with_paths=False):
+    if with_paths and parse is not None:
+        raise TypeError("Can't use `parse` with `with_paths=True`, parse the values of the `(path, value)` pairs instead")
+    return _iter(
+        needle,
+        haystack,
+        compile_pods(needle).iter_search(haystack, type, with_paths=with_paths),
+        parse,
+        allow_mismatch=allow_mismatch,
+    )
+
+
+@overload
+def filter(
+    needle: Callable[[T], object],
+    haystack: Iterable[T],
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+) -> Iterator[T]:
+    """
+    `haystack` is a sequence of T elements, and `needle` must accept `T` values. If `parse` is None, we yield T's.
+    """
+
+
+@overload
+def filter(
+    needle: Callable[[T], object],
+    haystack: Iterable[T],
+    parse: Callable[[T], TPrime],
+    *,
+    allow_mismatch: bool = False,
+) -> Iterator[TPrime]:
+    """
+    If `parse` is not None, then we yield whatever type `parse` returns.
+    """
+
+
+def filter(needle, haystack, parse=None, *, allow_mismatch=False):
+    return _iter(
+        needle,
+        haystack,
+        _filter(needle, haystack),
+        parse,
+        allow_mismatch=allow_mismatch,
+    )
+
+
+def _re_matches(needle, haystack, flags=0):
+    # yields the same values as `_re.findall` would return
+    if is_buffer_source(haystack):
+        yield from _buffer_re_matches(needle, haystack, flags)
+        return
+    for match in compile_regex(needle, flags).finditer(haystack):
+        yield findall_value(match)
+
+
+def _buffer_re_matches(needle, haystack, flags):
+    # A bytes regex runs over the raw bytes, and gives bytes matches, as with `re`. A str regex needs text, so that `\w`, `.` and
+    # the like match characters rather than bytes, and the buffer is then decoded first, as UTF-8, raising `UnicodeDecodeError` if
+    # it isn't valid
+    pattern = compile_regex(needle, flags)
+    with open_buffer(haystack) as buffer:
+        matches = pattern.finditer(buffer if isinstance(pattern.pattern, bytes) else str(buffer, "UTF-8"))
+        try:
+            for match in matches:
+                yield findall_value(match)
+        finally:
+            # the iterator holds on to the buffer, which would prevent a memory map from being closed
+            del matches
+
+
+def _iter(needle, haystack, results, parse=None, allow_mismatch=False):
+    results = iter(results)
+    for first in results:
+        results = chain((first,), results)
+        break
+    else:
+        if not allow_mismatch:
+            raise NotFound(needle, haystack)
+    if parse is not None:
+        results = map(parse, results)
+    return results
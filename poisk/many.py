@@ -1,20 +1,23 @@
 #!/usr/bin/env python3
 
 # standards
-import re as _re
-from typing import Any, Callable, Iterable, List, Tuple, Type, TypeVar, overload
+import array
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Type, TypeVar, overload
 
 # 3rd parties
-from cssselect import HTMLTranslator
+from typing_extensions import Literal  # for pre-3.8 pythons
 
 # poisk
+from . import iter as _iter
 from .exceptions import NotFound
-from .pods import SearchablePods, pods_search
-from .types import RegexType, XPathType
+from .haystacks import BufferSource, is_buffer_source
+from .pods import PodsPath, PodsQuerySet, SearchablePods, pods_search
+from .regex import compile_regex
+from .types import BytesRegexType, RegexHaystack, RegexType, XPathType
+from .validation import TypeSpec
+from .xpath import xpath_search
 
 
-_css_to_xpath = HTMLTranslator().css_to_xpath
-
 _filter = filter
 
 
@@ -28,7 +31,7 @@ TPrime = TypeVar("TPrime")
 @overload
 def re(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: None = None,
     *,
     allow_mismatch: bool = False,
@@ -42,7 +45,7 @@ def re(
 @overload
 def re(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: Callable[[str], T],
     *,
     allow_mismatch: bool = False,
@@ -53,8 +56,38 @@ def re(
     """
 
 
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> List[bytes]:
+    """
+    With a bytes regex, `haystack` must be raw bytes or a file (see `haystacks.BufferSource`), and we return a list of bytes.
+    This is the way to search a large file: a str regex needs the whole file to be decoded into a str first.
+    """
+
+
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[bytes], T],
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> List[T]: ...
+
+
 def re(needle, haystack, parse=None, *, allow_mismatch=False, flags=0):
-    results = _re.findall(needle, haystack, flags=flags)
+    if is_buffer_source(haystack):
+        # the buffer might be a memory map, which needs to be closed once we're done
+        results = list(_iter._re_matches(needle, haystack, flags))  # pylint: disable=protected-access
+    else:
+        results = compile_regex(needle, flags).findall(haystack)
     return _many(
         needle,
         haystack,
@@ -67,7 +100,7 @@ def re(needle, haystack, parse=None, *, allow_mismatch=False, flags=0):
 @overload
 def re_groups(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: None = None,
     *,
     allow_mismatch: bool = False,
@@ -78,7 +111,7 @@ def re_groups(
 @overload
 def re_groups(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: Callable[[Tuple[str, ...]], T],
     *,
     allow_mismatch: bool = False,
@@ -86,6 +119,31 @@ def re_groups(
 ) -> List[T]:
     ...
 
+
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> List[Tuple[bytes, ...]]:
+    """
+    With a bytes regex, `haystack` must be raw bytes or a file (see `haystacks.BufferSource`), and we return a list of bytes.
+    """
+
+
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[Tuple[bytes, ...]], T],
+    *,
+    allow_mismatch: bool = False,
+    flags: int = 0,
+) -> List[T]: ...
+
 def re_groups(needle, haystack, parse=None, *, allow_mismatch=False, flags=0):
     return re(needle, haystack, parse, allow_mismatch=allow_mismatch, flags=flags)
 
@@ -105,6 +163,9 @@ def etree(
     When `needle` is an XPath/CSS query. If `parse` is None, we return a list of Elements. Note that this means that if the xpath
     selects a string (e.g. "./a/@href"), then you need to specify `parse=str` to please the type checker.
 
+    Whether `needle` is XPath or CSS is guessed, unless it's specified with the `kind` kwarg, see `xpath.NEEDLE_KINDS`. Other kwargs
+    are passed on to lxml's `xpath` method.
+
     Note that the type annotation here is slightly off. It says we accept any type that has an `xpath` method, and then return a
     list of the same type, which isn't 100% correct: the output should be a list of ET._Element objects, but the input could be an
     ET._ElementTree object. Hopefully it'll work out, since the two classes have very similar interfaces.
@@ -140,13 +201,7 @@ def etree(
     """
 
 def etree(needle, haystack, parse=None, *, allow_mismatch=False, **kwargs):
-    if _re.search(r'[@/]|\(\)', needle):
-        # XPath is able to search outside of a given node's subtree. We don't want that, we only want to change the subtree. If the
-        # path doesn't already start with "./", prepend a dot, and slashes if there weren't already some.
-        xpath = _re.sub(r'^(?!\./)/{,2}', lambda m: '.' + (m.group() or '//'), needle)
-    else:
-        xpath = _css_to_xpath(needle)
-    results = haystack.xpath(xpath, **kwargs)
+    results = xpath_search(needle, haystack, **kwargs)
     return _many(
         needle,
         haystack,
@@ -212,8 +267,41 @@ def pods(
     """
 
 
-def pods(needle, haystack, parse=None, *, type=None, allow_mismatch=False):
-    results = pods_search(needle, haystack, type=type)
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: TypeSpec,
+    allow_mismatch: bool = False,
+) -> List[Any]:
+    """
+    If `type` is a richer type spec than a class (see the `validation` module), we can't tell what type the results will be.
+    There's then no `parse` either, since we couldn't check that it accepts the results.
+    """
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: Optional[TypeSpec] = None,
+    allow_mismatch: bool = False,
+    with_paths: Literal[True],
+) -> List[Tuple[PodsPath, Any]]:
+    """
+    If `with_paths` is set, we return a list of `(path, value)` pairs, see `pods.search_paths`.
+    Passing a `parse` as well raises a `TypeError`, since it would be given the pairs.
+    """
+
+
+def pods(needle, haystack, parse=None, *, type=None, allow_mismatch=False, with_paths=False):
+    if with_paths and parse is not None:
+        raise TypeError("Can't use `parse` with `with_paths=True`, parse the values of the `(path, value)` pairs instead")
+    results = pods_search(needle, haystack, type, with_paths=with_paths)
     return _many(
         needle,
         haystack,
@@ -223,6 +311,40 @@ def pods(needle, haystack, parse=None, *, type=None, allow_mismatch=False):
     )
 
 
+def pods_array(needle: str, haystack: SearchablePods, dtype: Any = "d", *, allow_mismatch: bool = False) -> Any:
+    """
+    Like `pods`, but the results are written straight into an array rather than a list. If `dtype` is one of the `array` module's
+    typecodes, e.g. "d" for floats or "q" for ints, this returns an `array.array`. Any other `dtype` is a NumPy dtype, and this
+    returns a NumPy array (NumPy is then required).
+
+    There is no `parse` and no `type`: the array itself converts the values, and raises `TypeError` (or NumPy's `ValueError`) on the
+    first value that isn't of the right type.
+    """
+    return _to_array(_iter.pods(needle, haystack, allow_mismatch=allow_mismatch), dtype)
+
+
+def pods_arrays(
+    needles: Mapping[str, str],
+    haystack: SearchablePods,
+    dtype: Any = "d",
+    *,
+    allow_mismatch: bool = False,
+) -> Dict[str, Any]:
+    """
+    Same as `{name: pods_array(needle, haystack, ...) for name, needle in needles.items()}`, but all needles are searched for in
+    a single walk of the haystack (see `PodsQuerySet`). `dtype` is either one dtype for all columns, or a dict mapping names to
+    dtypes. As the walk collects all the results first, each array is allocated at its final size, whereas `pods_array` grows its
+    array as the results come in.
+    """
+    columns = PodsQuerySet(needles.values()).search(haystack)
+    arrays = {}
+    for (name, needle), results in zip(needles.items(), columns):
+        if not results and not allow_mismatch:
+            raise NotFound(needle, haystack)
+        arrays[name] = _to_array(results, dtype[name] if isinstance(dtype, Mapping) else dtype)
+    return arrays
+
+
 @overload
 def filter(
     needle: Callable[[T], object],
@@ -260,6 +382,18 @@ def filter(needle, haystack, parse=None, allow_mismatch=False):
     )
 
 
+def _to_array(results: Iterable[Any], dtype: Any) -> Any:
+    # when `results` is a list, both `array.array` and `numpy.fromiter` (given its length) allocate the array once, rather than
+    # growing it as the results come in
+    if isinstance(dtype, str) and dtype in array.typecodes:
+        return array.array(dtype, results)
+    try:
+        import numpy  # type: ignore[import-not-found, unused-ignore]  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        raise ImportError(f"NumPy is needed for dtype {dtype!r}, use one of {array.typecodes!r} for an `array.array`") from None
+    return numpy.fromiter(results, dtype=dtype, count=len(results) if isinstance(results, list) else -1)
+
+
 def _many(needle, haystack, results, parse=None, allow_mismatch=False):
     if not results and not allow_mismatch:
         raise NotFound(needle, haystack)
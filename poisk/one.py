@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 
 # standards
-from typing import Any, Callable, Iterable, List, Optional, Tuple, Type, TypeVar, overload
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Type, TypeVar, overload
 
 # 3rd parties
 from typing_extensions import Literal  # for pre-3.8 pythons
 
 # poisk
-from . import many
+from . import iter
 from .exceptions import ManyFound, NotFound
-from .pods import SearchablePods
-from .types import RegexType, XPathType
+from .haystacks import BufferSource
+from .pods import PodsPath, SearchablePods
+from .regex import compile_regex, findall_value
+from .types import BytesRegexType, RegexHaystack, RegexType, XPathType
+from .validation import TypeSpec
 
 
 T = TypeVar("T")  # pylint: disable=invalid-name
@@ -21,7 +24,7 @@ TPrime = TypeVar("TPrime")
 @overload
 def re(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: None = None,
     *,
     allow_mismatch: Literal[False] = False,
@@ -38,7 +41,7 @@ def re(
 @overload
 def re(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: None = None,
     *,
     allow_mismatch: Literal[True],
@@ -54,7 +57,7 @@ def re(
 @overload
 def re(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: Callable[[str], T],
     *,
     allow_mismatch: Literal[False] = False,
@@ -70,7 +73,7 @@ def re(
 @overload
 def re(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: Callable[[str], T],
     *,
     allow_mismatch: Literal[True],
@@ -83,11 +86,84 @@ def re(
     """
 
 
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: Literal[False] = False,
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> bytes:
+    """
+    With a bytes regex, `haystack` must be raw bytes or a file (see `haystacks.BufferSource`), and we return bytes.
+    Prefer a bytes regex for large files, see `many.re`.
+    """
+
+
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: Literal[True],
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> Optional[bytes]: ...
+
+
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[bytes], T],
+    *,
+    allow_mismatch: Literal[False] = False,
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> T: ...
+
+
+@overload
+def re(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[bytes], T],
+    *,
+    allow_mismatch: Literal[True],
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> Optional[T]: ...
+
+
 def re(needle, haystack, parse=None, *, allow_mismatch=False, allow_many=False, allow_duplicates=False, flags=0):
+    if type(haystack) is str:  # pylint: disable=unidiomatic-typecheck  # subclasses take the general path
+        # The most common case, where the matches are consumed straight from `finditer`, without the layers of generators that
+        # `iter.re` needs to also handle files
+        matches = compile_regex(needle, flags).finditer(haystack)
+        for match in matches:
+            break
+        else:
+            if allow_mismatch:
+                return None
+            raise NotFound(needle, haystack)
+        first = findall_value(match) if parse is None else parse(findall_value(match))
+        if not allow_many:
+            for match in matches:
+                other = findall_value(match) if parse is None else parse(findall_value(match))
+                if not (allow_duplicates and (other is first or other == first)):  # see `_check_no_others`
+                    raise ManyFound(needle, haystack)
+        return first
     return _one(
         needle,
         haystack,
-        many.re(
+        iter.re(
             needle,
             haystack,
             parse,
@@ -102,7 +178,7 @@ def re(needle, haystack, parse=None, *, allow_mismatch=False, allow_many=False,
 @overload
 def re_groups(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: None = None,
     *,
     allow_mismatch: Literal[False] = False,
@@ -115,7 +191,7 @@ def re_groups(
 @overload
 def re_groups(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: None = None,
     *,
     allow_mismatch: Literal[True],
@@ -128,7 +204,7 @@ def re_groups(
 @overload
 def re_groups(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: Callable[[Tuple[str, ...]], T],
     *,
     allow_mismatch: Literal[False] = False,
@@ -141,7 +217,7 @@ def re_groups(
 @overload
 def re_groups(
     needle: RegexType,
-    haystack: str,
+    haystack: RegexHaystack,
     parse: Callable[[Tuple[str, ...]], T],
     *,
     allow_mismatch: Literal[True],
@@ -151,6 +227,61 @@ def re_groups(
 ) -> Optional[T]: ...
 
 
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: Literal[False] = False,
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> Tuple[bytes, ...]:
+    """
+    With a bytes regex, `haystack` must be raw bytes or a file (see `haystacks.BufferSource`), and we return bytes.
+    """
+
+
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: None = None,
+    *,
+    allow_mismatch: Literal[True],
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> Optional[Tuple[bytes, ...]]: ...
+
+
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[Tuple[bytes, ...]], T],
+    *,
+    allow_mismatch: Literal[False] = False,
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> T: ...
+
+
+@overload
+def re_groups(
+    needle: BytesRegexType,
+    haystack: BufferSource,
+    parse: Callable[[Tuple[bytes, ...]], T],
+    *,
+    allow_mismatch: Literal[True],
+    allow_many: bool = False,
+    allow_duplicates: bool = False,
+    flags: int = 0,
+) -> Optional[T]: ...
+
+
 def re_groups(needle, haystack, parse=None, *, allow_mismatch=False, allow_duplicates=False, allow_many=False, flags=0):
     return re(
         needle,
@@ -276,7 +407,7 @@ def etree(
     return _one(
         needle,
         haystack,
-        many.etree(
+        iter.etree(
             needle,
             haystack,
             parse,
@@ -454,6 +585,37 @@ def pods(
     """
 
 
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: TypeSpec,
+    allow_mismatch: bool = False,
+) -> Any:
+    """
+    If `type` is a richer type spec than a class (see the `validation` module), we can't tell what type the results will be.
+    There's then no `parse` either, since we couldn't check that it accepts the results.
+    """
+
+
+@overload
+def pods(
+    needle: str,
+    haystack: SearchablePods,
+    parse: None = None,
+    *,
+    type: Optional[TypeSpec] = None,
+    allow_mismatch: Literal[False] = False,
+    with_paths: Literal[True],
+) -> Tuple[PodsPath, Any]:
+    """
+    If `with_paths` is set, we return a `(path, value)` pair, see `pods.search_paths`.
+    Passing a `parse` as well raises a `TypeError`, since it would be given the pairs.
+    """
+
+
 def pods(
     needle,
     haystack,
@@ -463,19 +625,22 @@ def pods(
     allow_mismatch=False,
     allow_many=False,
     allow_duplicates=False,
+    with_paths=False,
 ):
     return _one(
         needle,
         haystack,
-        many.pods(
+        iter.pods(
             needle,
             haystack,
             parse,
             type=type,
             allow_mismatch=allow_mismatch,
+            with_paths=with_paths,
         ),
         allow_many,
         allow_duplicates,
+        with_paths=with_paths,
     )
 
 
@@ -553,7 +718,7 @@ def filter(
     return _one(
         needle,
         haystack,
-        many.filter(
+        iter.filter(
             needle,
             haystack,
             parse,
@@ -564,17 +729,44 @@ def filter(
     )
 
 
-def _one(needle: object, haystack: object, results: List[T], allow_many: bool, allow_duplicates: bool):
-    if not results:
+def _one(
+    needle: object,
+    haystack: object,
+    results: Iterator[T],
+    allow_many: bool,
+    allow_duplicates: bool,
+    *,
+    with_paths: bool = False,
+):
+    """
+    Consumes no more of `results` than needed: the first element if `allow_many` is set, else until a second (distinct, if
+    `allow_duplicates` is set) element is found. If `with_paths` is set, the results are `(path, value)` pairs, which always differ
+    by path, so only their values are compared.
+    """
+    for first in results:
+        break
+    else:
         return None  # allow_mismatch must have been True
-    if allow_duplicates:
-        seen = set()
-        deduplicated: List[T] = []
-        for element in results:
-            if element not in seen:
-                seen.add(element)
-                deduplicated.append(element)
-        results = deduplicated
-    if len(results) > 1 and not allow_many:
-        raise ManyFound(needle, haystack)
-    return results[0]
+    if not allow_many:
+        _check_no_others(needle, haystack, first, results, allow_duplicates, with_paths=with_paths)
+    return first
+
+
+def _check_no_others(
+    needle: object,
+    haystack: object,
+    first: T,
+    others: Iterator[T],
+    allow_duplicates: bool,
+    *,
+    with_paths: bool = False,
+) -> None:
+    # raises `ManyFound` as soon as one of `others` is distinct from `first`, see `_one`
+    first_value = first[1] if with_paths else first  # type: ignore[index]
+    for other in others:
+        other_value = other[1] if with_paths else other  # type: ignore[index]
+        # Since any value distinct from the first is enough to raise, the first is the only one we need to compare to. Like a set,
+        # we check identity before equality, which is all that lxml elements support, but we don't need values to be hashable, so
+        # that e.g. dicts and lists can be compared.
+        if not (allow_duplicates and (other_value is first_value or other_value == first_value)):
+            raise ManyFound(needle, haystack)
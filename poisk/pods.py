@@ -28,23 +28,172 @@ Initially this was going to use JMESPath, but that library has a few limitations
 So we hack our own, and it does the job.
 
 
-Note that this is therefore a lot simpler and much less featured than JMESPath. For instance we don't do filters like
-"locations[?state == 'WA'].name", we don't have the pipe operator, functions like `sort` etc. But these aren't really necessary
-when working in Python, as you can just as easily write those as list expressions or function calls.
+Note that this is therefore a lot simpler and much less featured than JMESPath. For instance we don't have the pipe operator,
+functions like `sort` etc. But these aren't really necessary when working in Python, as you can just as easily write those as list
+expressions or function calls.
+
+We do have filters, like "locations[?state == 'WA'].name", since applying them during the search avoids collecting elements that
+are then thrown away. Like `[]`, a filter step selects the elements of a list, but only those for which the condition holds. The
+condition is either a path of keys (e.g. `[?address.state]`), which holds if the path exists, or a path compared to a literal with
+one of `==`, `!=`, `<`, `<=`, `>` and `>=`. The literal is a quoted string, a number, `true`, `false` or `null`. An element for
+which the path doesn't exist never satisfies a comparison, and neither does one whose value can't be compared to the literal (e.g.
+a string compared with `<` to a number). Booleans aren't numbers: `true` doesn't equal 1, and `<`, `<=`, `>` and `>=` never hold
+for them.
+
+Two more steps select several nodes at once: `*` selects all the values of a dict (e.g. "rates.*.amount"), and `..key` selects the
+values of `key` in all the dicts found anywhere under the current node, at any depth (e.g. "payload..id", or "..id" anywhere in the
+haystack). Results are in document order, a node being listed before the nodes it contains.
+
+Searches can also return where each result was found, as `(path, value)` pairs, with `with_paths=True`. A path is a tuple of the
+dict keys and list indexes that lead from the haystack to the value, so that the value can then be looked up again directly with
+`pods_get`, without searching again.
+
+Lists can also be indexed from the end, e.g. "results[-1]", and sliced with the same syntax as in Python, e.g. "results[:10]" or
+"results[::-1]". Slices don't copy the list, the selected elements are looked up one at a time, as they're searched.
 """
 
 # standards
+from bisect import bisect_left
 from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from itertools import repeat
+import json
 import re
-from typing import Iterable, List, Mapping as MappingType, Type, TypeVar, Union, overload
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping as MappingType,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
+
+# 3rd parties
+from typing_extensions import Literal  # for pre-3.8 pythons
+
+# poisk
+from .exceptions import NotFound
+from .haystacks import BufferSource, is_buffer_source, open_buffer
+from .pods_json import search_json
+from .pods_steps import CHILDREN, WILDCARD, Descendant, Predicate, Slice, descendants, has_index, search_steps
+from .validation import TypeSpec, all_type_checked, type_checked
+
 
+# stands in for the key of nodes that aren't values in a dict
+_NO_KEY = object()
 
-CHILDREN = object()
+# How many compiled needles `compile_pods` keeps around
+PODS_CACHE_SIZE = 1024
 
 
 T = TypeVar("T")  # pylint: disable=invalid-name
 
-SearchablePods = Union[MappingType, list, tuple]  # NB not using `Sequence` as we don't want to include `str`
+# NB not using `Sequence` as we don't want to include `str`
+SearchablePods = Union[MappingType, list, tuple, BufferSource, "PodsIndex"]
+
+# The dict keys and list indexes that lead to a node, as returned by searches with `with_paths=True`
+PodsPath = Tuple[Any, ...]
+
+
+class PodsQuery:
+    """
+    A pods needle that's been parsed once into a tuple of steps, and can then be searched for in any number of haystacks.
+    """
+
+    __slots__ = ("needle", "steps")
+
+    def __init__(self, needle: str):
+        self.needle = needle
+        self.steps: Tuple[object, ...] = tuple(_parse_steps(needle))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.needle!r})"
+
+    @overload
+    def search(self, haystack: SearchablePods) -> List[object]: ...
+
+    @overload
+    def search(self, haystack: SearchablePods, type: Type[T]) -> List[T]: ...
+
+    @overload
+    def search(self, haystack: SearchablePods, type: TypeSpec) -> List[Any]: ...
+
+    @overload
+    def search(
+        self,
+        haystack: SearchablePods,
+        type: Optional[TypeSpec] = None,
+        *,
+        with_paths: Literal[True],
+    ) -> List[Tuple[PodsPath, Any]]: ...
+
+    def search(self, haystack, type=None, *, with_paths=False):
+        results = self._walk(haystack, with_paths)
+        # since all the results are returned anyway, the mismatches are all reported together
+        return list(results) if type is None else all_type_checked(results, type, with_paths)
+
+    @overload
+    def iter_search(self, haystack: SearchablePods) -> Iterator[object]: ...
+
+    @overload
+    def iter_search(self, haystack: SearchablePods, type: Type[T]) -> Iterator[T]: ...
+
+    @overload
+    def iter_search(self, haystack: SearchablePods, type: TypeSpec) -> Iterator[Any]: ...
+
+    @overload
+    def iter_search(
+        self,
+        haystack: SearchablePods,
+        type: Optional[TypeSpec] = None,
+        *,
+        with_paths: Literal[True],
+    ) -> Iterator[Tuple[PodsPath, Any]]: ...
+
+    def iter_search(self, haystack, type=None, *, with_paths=False):
+        """
+        Same as `search`, but lazily yields the results one by one, in the same order, so that the caller can stop the search
+        early.
+
+        If `haystack` is JSON text (see `haystacks.BufferSource`), it's searched without being decoded, and only the results are.
+
+        If `type` is given, the results are checked against it as they're found (see the `validation` module), and a
+        `ResultTypeError` is raised as soon as one doesn't match.
+
+        If `with_paths` is set, this yields `(path, value)` pairs instead, see `search_paths`. A `PodsIndex` doesn't keep track of
+        paths, so its haystack is then searched directly, and JSON text is decoded in full before being searched.
+        """
+        results = self._walk(haystack, with_paths)
+        return results if type is None else type_checked(results, type, with_paths)
+
+    def _walk(self, haystack: Any, with_paths: bool) -> Iterator[Any]:
+        if with_paths:
+            if isinstance(haystack, PodsIndex):
+                haystack = haystack.haystack
+            elif is_buffer_source(haystack):
+                with open_buffer(haystack) as buffer:
+                    haystack = json.loads(bytes(buffer))
+            return search_paths(self.steps, haystack)
+        if isinstance(haystack, PodsIndex):
+            return iter(haystack.lookup(self.steps))
+        if is_buffer_source(haystack):
+            return search_json(self.steps, haystack)
+        return search_steps(self.steps, haystack)
+
+
+@lru_cache(maxsize=PODS_CACHE_SIZE)
+def compile_pods(needle: str) -> PodsQuery:
+    """
+    Returns a `PodsQuery` for the given needle. The most recently used queries are cached, so calling this repeatedly with the same
+    needle only parses it once.
+    """
+    return PodsQuery(needle)
 
 
 @overload
@@ -62,30 +211,363 @@ def pods_search(
 ) -> List[T]: ...
 
 
+@overload
+def pods_search(
+    needle: str,
+    haystack: SearchablePods,
+    type: TypeSpec,
+) -> List[Any]: ...
+
+
+@overload
+def pods_search(
+    needle: str,
+    haystack: SearchablePods,
+    type: Optional[TypeSpec] = None,
+    *,
+    with_paths: Literal[True],
+) -> List[Tuple[PodsPath, Any]]: ...
+
+
 def pods_search(
     needle: str,
     haystack: SearchablePods,
     type=None,
+    *,
+    with_paths=False,
 ):
-    results = []
-    stack = [(haystack, list(_parse_steps(needle)))]
+    return compile_pods(needle).search(haystack, type, with_paths=with_paths)
+
+
+def pods_get(path: PodsPath, haystack: Union[MappingType, list, tuple, "PodsIndex"]) -> Any:
+    """
+    Returns the node of `haystack` at `path`, as returned by a search with `with_paths=True`. This only looks up each key of the
+    path in turn, so it's much cheaper than searching again. Raises `NotFound` if there's no such node, e.g. if the haystack has
+    changed since the path was found.
+    """
+    node = haystack.haystack if isinstance(haystack, PodsIndex) else haystack
+    for key in path:
+        if (isinstance(node, Mapping) and key in node) or has_index(node, key):
+            node = node[key]  # type: ignore  # see `PodsQuery.iter_search`
+        else:
+            raise NotFound(path, haystack)
+    return node
+
+
+def search_paths(steps: Tuple[object, ...], haystack: object) -> Iterator[Tuple[PodsPath, object]]:
+    """
+    Same as `search_steps`, but yields `(path, node)` pairs, where `path` is the tuple of keys and indexes that leads from
+    `haystack` to the node. Negative indexes are resolved, so that each node only has one path.
+    """
+    # Same as in `pods_steps._search_steps`, except that the iterators on the stack yield `(keys, node)` pairs, where `keys` are the
+    # keys that lead to the node from the node being fanned out, and that they're pushed with the length of the path to that node.
+    # `path` is the path to the current node, and it is cut back to that length before descending into the next sibling.
+    end = len(steps)
+    path: List[object] = []
+    stack: List[Tuple[Iterator[Tuple[Tuple[object, ...], Any]], int, int]] = [(iter((((), haystack),)), 0, 0)]
     while stack:
-        node, steps = stack.pop()
-        if not steps:
-            if type is not None and not isinstance(node, type):
-                raise TypeError(f"Expected {type.__name__}, found {node.__class__.__name__}")
-            results.append(node)
+        entries, pos, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        keys, node = entry
+        del path[depth:]
+        path.extend(keys)
+        while pos < end:
+            step = steps[pos]
+            if step is CHILDREN or isinstance(step, (Predicate, Slice)):
+                if isinstance(node, Sequence) and (isinstance(step, Slice) or not isinstance(node, str)):  # see `has_index`
+                    stack.append((_keyed_children(node, step), pos + 1, len(path)))
+                break
+            elif step is WILDCARD:
+                if isinstance(node, Mapping):
+                    stack.append((_keyed_children(node, step), pos + 1, len(path)))
+                break
+            elif isinstance(step, Descendant):
+                stack.append((_descendant_paths(node, step.key), pos + 1, len(path)))
+                break
+            elif isinstance(node, Mapping) and step in node:
+                path.append(step)
+                node = node[step]
+                pos += 1
+            elif isinstance(step, int) and has_index(node, step):
+                path.append(step if step >= 0 else step + len(node))
+                node = node[step]
+                pos += 1
+            else:
+                break
         else:
-            head, *tail = steps
-            if head is CHILDREN:
-                if isinstance(node, Sequence) and not isinstance(node, str):
-                    for element in reversed(node):
-                        stack.append((element, tail))
-            elif (isinstance(node, Mapping) and head in node) or (
-                isinstance(node, Sequence) and isinstance(head, int) and 0 <= head < len(node)
-            ):
-                stack.append((node[head], tail))  # type: ignore  # mypy gets confused but I think it's fine
-    return results
+            yield tuple(path), node
+
+
+class PodsQuerySet:
+    """
+    Several pods needles, compiled into a trie of their steps, so that they can all be searched for in a single depth-first walk
+    of the haystack. Steps shared by several needles, e.g. the "payload.results[]" in "payload.results[].x" and
+    "payload.results[].y", are only walked once.
+    """
+
+    __slots__ = ("queries", "_trie")
+
+    def __init__(self, needles: Iterable[Union[str, PodsQuery]]):
+        self.queries = tuple(compile_pods(needle) if isinstance(needle, str) else needle for needle in needles)
+        self._trie = _TrieNode()
+        for index, query in enumerate(self.queries):
+            trie = self._trie
+            for step in query.steps:
+                trie = trie.child(step)
+            trie.terminals.append(index)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({[query.needle for query in self.queries]!r})"
+
+    def search(self, haystack: SearchablePods) -> List[List[object]]:
+        """
+        Returns one list of results per needle, the same as calling `PodsQuery.search` for each needle. JSON text (see
+        `haystacks.BufferSource`) is decoded in full before being searched.
+        """
+        if isinstance(haystack, PodsIndex):
+            return [list(haystack.lookup(query.steps)) for query in self.queries]
+        if is_buffer_source(haystack):
+            with open_buffer(haystack) as buffer:  # type: ignore[arg-type]  # mypy can't narrow with `is_buffer_source`
+                haystack = json.loads(bytes(buffer))
+        results: List[List[object]] = [[] for _ in self.queries]
+        stack: List[Tuple[object, _TrieNode]] = [(haystack, self._trie)]
+        while stack:
+            node, trie = stack.pop()
+            for index in trie.terminals:
+                results[index].append(node)
+            if len(trie.children) == 1:
+                # the common case, where all the needles under this trie node share the next step
+                stack.extend(reversed(list(_select(node, *trie.children[0]))))
+            else:
+                children: List[Tuple[object, _TrieNode]] = []
+                for step, child_trie in trie.children:
+                    children.extend(_select(node, step, child_trie))
+                stack.extend(reversed(children))
+        return results
+
+
+class PodsIndex:
+    """
+    Wraps a haystack that's going to be searched with many needles, and remembers the nodes reached by every prefix of the needles
+    searched for so far. A needle that shares a prefix with a previous one, e.g. "payload.results[].y" after
+    "payload.results[].x", then starts from the nodes found at the end of that prefix ("payload.results[]") rather than from the
+    root. Searching again for the same needle costs a single dict lookup.
+
+    The first `..key` step searched for also builds an index of where each key appears in the whole haystack, so that all `..key`
+    steps can then be answered without walking the haystack again, see `_KeyIndex`.
+
+    Pass it as the haystack to `one.pods`, `many.pods`, etc. Note that, since all intermediate results are kept, memory usage grows
+    with the number of distinct prefixes searched for, and with how many nodes `[]` steps fan out to. The haystack must not be
+    modified while the index is in use.
+    """
+
+    __slots__ = ("haystack", "_nodes", "_key_index")
+
+    def __init__(self, haystack: Union[MappingType, list, tuple]):
+        self.haystack = haystack
+        self._nodes: Dict[Tuple[object, ...], List[object]] = {(): [haystack]}
+        self._key_index: Optional[_KeyIndex] = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self._nodes)} paths)"
+
+    def lookup(self, steps: Tuple[object, ...]) -> List[object]:
+        """
+        Returns the nodes selected by `steps` (see `PodsQuery`), in the same order as `PodsQuery.search` would. The returned list
+        is shared with the index, and must not be modified.
+        """
+        pos = len(steps)
+        while steps[:pos] not in self._nodes:
+            pos -= 1
+        nodes = self._nodes[steps[:pos]]
+        # Applying each step to all the nodes of the previous level yields them in the same order as a depth-first walk would
+        for depth in range(pos, len(steps)):
+            step = steps[depth]
+            if isinstance(step, Descendant):
+                if self._key_index is None:
+                    self._key_index = _KeyIndex(self.haystack)
+                nodes = [child for node in nodes for child in self._key_index.descendants(node, step.key)]
+            else:
+                nodes = [child for node in nodes for child, _ in _select(node, step, None)]
+            self._nodes[steps[: depth + 1]] = nodes
+        return nodes
+
+
+class _KeyIndex:
+    """
+    Numbers all the nodes of a haystack in the order of a depth-first walk, and records, for each key, the numbers and values of all
+    the nodes found under that key in a dict. Since all the nodes under a given dict or list are numbered consecutively, the values
+    of a key under that dict or list can then be found with a binary search, in the same order as `descendants` would yield them.
+    """
+
+    __slots__ = ("_numbers", "_values", "_ranges")
+
+    def __init__(self, haystack: object):
+        self._numbers: Dict[object, List[int]] = {}
+        self._values: Dict[object, List[object]] = {}
+        # maps the id of each dict and list to the range of numbers of the nodes under it. If the same object appears several times
+        # in the haystack, only its last occurrence is kept, but the nodes under it are the same anyway.
+        self._ranges: Dict[int, Tuple[int, int]] = {}
+        number = 0
+        stack: List[Tuple[Iterator[Tuple[object, object]], int, int]] = [(iter(((_NO_KEY, haystack),)), 0, 0)]
+        while stack:
+            entries, container_id, start = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                self._ranges[container_id] = (start, number)
+                continue
+            key, node = entry
+            if key is not _NO_KEY:
+                self._numbers.setdefault(key, []).append(number)
+                self._values.setdefault(key, []).append(node)
+            number += 1
+            if isinstance(node, Mapping):
+                stack.append((iter(node.items()), id(node), number))
+            elif isinstance(node, Sequence) and not isinstance(node, str):
+                stack.append((zip(repeat(_NO_KEY), node), id(node), number))
+        del self._ranges[0]  # the made-up container of the root
+
+    def descendants(self, node: object, key: str) -> List[object]:
+        """
+        Same as `list(descendants(node, key))`, for a `node` in the haystack.
+        """
+        node_range = self._ranges.get(id(node))
+        if node_range is None:
+            return []  # not a dict or list
+        numbers = self._numbers.get(key)
+        if not numbers:
+            return []
+        start, end = node_range
+        return self._values[key][bisect_left(numbers, start) : bisect_left(numbers, end)]
+
+
+class _TrieNode:
+    __slots__ = ("terminals", "children")
+
+    def __init__(self) -> None:
+        self.terminals: List[int] = []  # indices of the queries whose steps end here
+        self.children: List[Tuple[object, _TrieNode]] = []
+
+    def child(self, step: object) -> "_TrieNode":
+        for existing_step, child in self.children:
+            if existing_step is step or (type(existing_step) is type(step) and existing_step == step):
+                return child
+        child = _TrieNode()
+        self.children.append((step, child))
+        return child
+
+
+def _select(node: object, step: object, payload: T) -> Iterator[Tuple[object, T]]:
+    """
+    Yields the children of `node` selected by `step`, each paired with the given `payload`.
+    """
+    if step is CHILDREN:
+        if isinstance(node, Sequence) and not isinstance(node, str):
+            for element in node:
+                yield element, payload
+    elif isinstance(step, Predicate):
+        if isinstance(node, Sequence) and not isinstance(node, str):
+            for element in filter(step.matches, node):
+                yield element, payload
+    elif isinstance(step, Slice):
+        if isinstance(node, Sequence):  # see `has_index`
+            for index in step.indices(len(node)):
+                yield node[index], payload
+    elif step is WILDCARD:
+        if isinstance(node, Mapping):
+            for value in node.values():
+                yield value, payload
+    elif isinstance(step, Descendant):
+        for value in descendants(node, step.key):
+            yield value, payload
+    elif (isinstance(node, Mapping) and step in node) or has_index(node, step):
+        yield node[step], payload  # type: ignore  # see `PodsQuery.iter_search`
+
+
+def _keyed_children(node: Any, step: object) -> Iterator[Tuple[Tuple[object, ...], object]]:
+    """
+    Yields the children of `node` selected by a step that can select several of them, each with the key that leads to it, as a
+    1-tuple, for `search_paths`.
+    """
+    if step is WILDCARD:
+        for key, value in node.items():
+            yield (key,), value
+    elif isinstance(step, Slice):
+        for index in step.indices(len(node)):
+            yield (index,), node[index]
+    else:
+        for index, element in enumerate(node):
+            if step is CHILDREN or step.matches(element):  # type: ignore[attr-defined]  # else it's a `Predicate`
+                yield (index,), element
+
+
+def _descendant_paths(node: object, key: str) -> Iterator[Tuple[Tuple[object, ...], object]]:
+    """
+    Same as `descendants`, but yields `(path, value)` pairs, where `path` leads from `node` to the value.
+    """
+    path: List[object] = []
+    # iterators over the `(key, child)` entries of each node on the current path, each with the length of the path to that node
+    stack: List[Tuple[Iterator[Tuple[object, Any]], int]] = [(iter(((_NO_KEY, node),)), 0)]
+    while stack:
+        entries, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        entry_key, node = entry
+        del path[depth:]
+        if entry_key is not _NO_KEY:
+            path.append(entry_key)
+            if entry_key == key:
+                yield tuple(path), node
+        if isinstance(node, Mapping):
+            stack.append((iter(node.items()), len(path)))
+        elif isinstance(node, Sequence) and not isinstance(node, str):
+            stack.append((enumerate(node), len(path)))
+
+
+# A quoted string, in a filter
+_QUOTED_PATTERN = r"""(?: "(?:[^\\"]|\\.)*" | '(?:[^\\']|\\.)*' )"""
+
+_RE_STEP = re.compile(
+    r"""
+      \s*
+      # a `..key` step. In the middle of a needle, the separator before it has already consumed one of the dots
+      (?P<descendant> ^\s*\.\.\s* | (?<=\.)\.\s* )?
+      (?:
+          "  (?P<double> (?:[^\\"]|\\.)+ ) "
+        | '  (?P<single> (?:[^\\']|\\.)+ ) '
+        |    (?P<word> [\w\-\$]+ )
+        | \[ (?P<index> -?\d+ ) \]
+        | \[ (?P<slice> \s* -?\d* \s* : \s* -?\d* \s* (?: : \s* -?\d* \s* )? ) \]
+        |    (?P<brackets> \[\] )
+        |    (?P<wildcard> \* )
+        | \[\? (?P<predicate> (?: [^\]"'] | QUOTED )+ ) \]
+      )
+      (?: \s*\.\s* | (?=\s*\[) | $ )
+    """.replace("QUOTED", _QUOTED_PATTERN),
+    flags=re.X,
+)
+
+_RE_PREDICATE = re.compile(
+    r"""
+      \s*
+      (?P<path> (?: [^=!<>"'] | QUOTED )+? )
+      \s*
+      (?:
+        (?P<operator> == | != | <= | >= | < | > )
+        \s*
+        (?P<literal> QUOTED | [^\s"']+ )
+        \s*
+      )?
+      $
+    """.replace("QUOTED", _QUOTED_PATTERN),
+    flags=re.X,
+)
 
 
 def _parse_steps(needle: str) -> Iterable[Union[object]]:
@@ -96,34 +578,70 @@ def _parse_steps(needle: str) -> Iterable[Union[object]]:
     ["a", "b", "c"]
     >>> list(_parse_steps("a[].b[0].c"))
     ["a", CHILDREN, "b", 0, "c"]
+    >>> list(_parse_steps("a[?b.c == 'x'].d"))
+    ["a", Predicate(("b", "c"), "==", "x"), "d"]
+    >>> list(_parse_steps("a..b.*"))
+    ["a", Descendant("b"), WILDCARD]
+    >>> list(_parse_steps("a[-1].b[1:]"))
+    ["a", -1, "b", Slice(1, None, None)]
     """
     pos = 0
-    re_step = re.compile(
-        r"""
-          \s*
-          (?:
-              "  (?P<double> (?:[^\\"]|\\.)+ ) "
-            | '  (?P<single> (?:[^\\']|\\.)+ ) '
-            |    (?P<word> [\w\-\$]+ )
-            | \[ (?P<index> \d+ ) \]
-            |    (?P<brackets> \[\] )
-          )
-          (?: \s*\.\s* | (?=\s*\[) | $ )
-        """,
-        flags=re.X,
-    )
     while pos < len(needle):
-        match = re_step.match(needle, pos)
+        match = _RE_STEP.match(needle, pos)
         if not match:
             raise ValueError(f"Can't parse needle at '{needle[pos:]}'")
         groups = match.groupdict()
+        step: object
         if groups.get("double") or groups.get("single"):
-            string: str = groups.get("double") or groups.get("single")  # type: ignore[assignment]
-            yield re.sub(r"\\(.)", r"\1", string)
+            step = _unquote(groups.get("double") or groups.get("single"))  # type: ignore[arg-type]
         elif groups.get("index"):
-            yield int(groups["index"])
+            step = int(groups["index"])
+        elif groups.get("slice"):
+            step = _parse_slice(groups["slice"])
         elif groups.get("brackets"):
-            yield CHILDREN
+            step = CHILDREN
+        elif groups.get("predicate"):
+            step = _parse_predicate(groups["predicate"])
+        elif groups.get("wildcard"):
+            step = WILDCARD
         else:
-            yield groups.get("word")
+            step = groups.get("word")
+        if groups.get("descendant") is not None:
+            if not isinstance(step, str):
+                raise ValueError(f"Can't parse needle at '{needle[pos:]}': only keys can follow '..'")
+            step = Descendant(step)
+        yield step
         pos = match.end()
+
+
+def _parse_predicate(predicate: str) -> Predicate:
+    match = _RE_PREDICATE.match(predicate)
+    if not match:
+        raise ValueError(f"Can't parse filter '[?{predicate}]'")
+    path = tuple(_parse_steps(match.group("path")))
+    if not path or not all(isinstance(key, str) for key in path):
+        raise ValueError(f"Filter '[?{predicate}]' must start with a path of keys")
+    literal = match.group("literal")
+    if literal is None:
+        return Predicate(path)
+    if literal[0] in "'\"":
+        value: object = _unquote(literal[1:-1])
+    else:
+        try:
+            value = json.loads(literal)  # numbers, true, false and null
+        except ValueError:
+            raise ValueError(f"Can't parse literal {literal!r} in filter '[?{predicate}]'") from None
+        if isinstance(value, (list, dict)):
+            raise ValueError(f"Can't parse literal {literal!r} in filter '[?{predicate}]'")
+    return Predicate(path, match.group("operator"), value)
+
+
+def _parse_slice(text: str) -> Slice:
+    step = Slice(*(int(part) if part.strip() else None for part in text.split(":")))
+    if step.step == 0:
+        raise ValueError(f"Slice step cannot be zero in '[{text}]'")
+    return step
+
+
+def _unquote(string: str) -> str:
+    return re.sub(r"\\(.)", r"\1", string)
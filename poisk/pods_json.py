@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+"""
+Pods search directly over JSON text, without decoding the whole document.
+
+The JSON is scanned with a handful of regexes, and only the values selected by the needle are decoded (by the `json` module). Any
+other value is skipped over without being decoded, and the scan stops as soon as no more results are possible, so that for instance
+searching for "payload.total" doesn't need to look any further than the value of "total". Memory usage is therefore proportional to
+the size of the results, not of the document, especially when the document is a file, which we memory-map.
+
+A few differences with `json.loads` follow from this:
+
+<> The document is assumed to be well-formed. Errors are only detected in the parts of the document that are scanned.
+
+<> If a key is repeated in an object, we only descend into its first occurrence, whereas `json.loads` keeps the last one.
+
+Filter steps (`[?...]`) are the exception to not decoding what isn't selected: each element of the filtered list is decoded so that
+the condition can be checked, and the remaining steps are then applied to the decoded elements that satisfy it.
+
+Indexes and slices that count from the end of an array (e.g. `[-1]`, `[-10:]` or `[::-1]`) need to know how many elements it has.
+The array is then scanned twice: once to find where each element starts, and once more to walk the selected elements, in order.
+
+As in the in-memory search, indexes and slices select the characters of a JSON string (which is then decoded), while `[]` and
+`[?...]` select nothing in it.
+"""
+
+# standards
+import json
+import re
+import sys
+from typing import Any, Generator, Iterable, Iterator, NoReturn, Optional, Pattern, Tuple
+
+# poisk
+from .haystacks import BufferSource, open_buffer
+from .pods_steps import CHILDREN, WILDCARD, Descendant, Predicate, Slice, search_steps
+
+
+_json_decode = json.JSONDecoder().decode
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+
+_STRING_PATTERN = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+_STRING = re.compile(_STRING_PATTERN, flags=re.S)
+
+_SCALAR = re.compile(rb"[^ \t\n\r,\]}]+")
+
+# An object's key, up to the start of its value
+_KEY = re.compile(rb"(" + _STRING_PATTERN + rb")[ \t\n\r]*:[ \t\n\r]*", flags=re.S)
+
+# What comes after a value in an array or object: either a comma and the start of the next value, or the closing bracket
+_SEPARATOR = re.compile(rb"[ \t\n\r]*(?:,[ \t\n\r]*|([\]}]))")
+
+# The regex engine keeps some state for every iteration of a repeated group, so that it can backtrack, which means that matching a
+# pattern like `(?:...)*` over a large document uses memory proportional to the document. So we cap such repetitions, and loop in
+# Python when they don't cover the whole value.
+_MAX_REPEAT = rb"{0,64}"
+
+# Skips over anything but containers, i.e. scalars, strings (which might contain brackets), and punctuation
+_CONTENT_PATTERN = rb'[^"\[\]{}]*(?:' + _STRING_PATTERN + rb'[^"\[\]{}]*)' + _MAX_REPEAT
+
+_CONTENT = re.compile(_CONTENT_PATTERN, flags=re.S)
+
+
+def _compile_container(max_depth: int) -> Pattern[bytes]:
+    # Matches a whole array or object, provided it's not too large and has no more than `max_depth` levels of nesting. This lets
+    # the regex engine skip over most containers in one go, and we only have to count brackets in Python for the others.
+    # `_CONTENT_PATTERN` stops at brackets, which is where nested containers start, so a failed match doesn't backtrack much.
+    pattern = rb"[\[{]" + _CONTENT_PATTERN + rb"[\]}]"
+    for _ in range(max_depth - 1):
+        pattern = rb"[\[{]" + _CONTENT_PATTERN + rb"(?:(?:" + pattern + rb")" + _CONTENT_PATTERN + rb")" + _MAX_REPEAT + rb"[\]}]"
+    return re.compile(pattern, flags=re.S)
+
+
+_CONTAINER = _compile_container(4)
+
+
+# The `_walk` generator yields search results, and then returns the position just past the end of the value it walked, or None if
+# the caller told it that it didn't need to know that.
+_Walk = Generator[Any, None, Optional[int]]
+
+
+def search_json(steps: Tuple[object, ...], source: BufferSource) -> Iterator[Any]:
+    """
+    Yields the values selected by `steps` (see `PodsQuery`) in the JSON document held in `source`.
+    """
+    with open_buffer(source) as buffer:
+        yield from _walk(buffer, _skip_whitespace(buffer, 0), steps, 0, need_end=False)
+
+
+def _walk(buffer: Any, pos: int, steps: Tuple[object, ...], index: int, need_end: bool) -> _Walk:
+    if index == len(steps):
+        value_end = _skip_value(buffer, pos)
+        yield _decode(buffer[pos:value_end])
+        return value_end
+    step = steps[index]
+    first = buffer[pos : pos + 1]
+    end: Optional[int]
+    if isinstance(step, Descendant):
+        end = yield from _walk_descendants(buffer, pos, steps, index)
+    elif first == b"[" and (step is CHILDREN or isinstance(step, (int, Predicate, Slice))):
+        end = yield from _walk_array(buffer, pos, steps, index, need_end)
+    elif first == b"{" and (step is WILDCARD or isinstance(step, str)):
+        end = yield from _walk_object(buffer, pos, steps, index, need_end)
+    elif first == b'"' and isinstance(step, (int, Slice)):
+        # as in the in-memory search, indexes and slices select the characters of a string
+        end = _skip_value(buffer, pos)
+        yield from search_steps(steps[index:], _decode(buffer[pos:end]))
+    else:
+        # the step doesn't apply to this value, so there are no results under it
+        end = _skip_value(buffer, pos) if need_end else None
+    return end
+
+
+def _walk_array(buffer: Any, pos: int, steps: Tuple[object, ...], index: int, need_end: bool) -> _Walk:
+    step = steps[index]
+    selected = None
+    if isinstance(step, Slice):
+        if (step.start or 0) >= 0 and (step.stop or 0) >= 0 and (step.step or 1) > 0:
+            selected = range(step.start or 0, sys.maxsize if step.stop is None else step.stop, step.step or 1)
+        else:
+            return (yield from _walk_array_from_end(buffer, pos, steps, index, need_end))
+    elif isinstance(step, int) and step < 0:
+        return (yield from _walk_array_from_end(buffer, pos, steps, index, need_end))
+    pos = _skip_whitespace(buffer, pos + 1)
+    if buffer[pos : pos + 1] == b"]":
+        return pos + 1
+    element_index = 0
+    while True:
+        if step is CHILDREN:
+            end = yield from _walk(buffer, pos, steps, index + 1, need_end=True)
+        elif isinstance(step, Predicate):
+            end = _skip_value(buffer, pos)
+            element = _decode(buffer[pos:end])
+            if step.matches(element):
+                yield from search_steps(steps[index + 1 :], element)
+        elif selected is not None:
+            if element_index in selected:
+                end = yield from _walk(buffer, pos, steps, index + 1, need_end=True)
+            elif element_index >= selected.stop and not need_end:
+                return None
+            else:
+                end = _skip_value(buffer, pos)
+        elif element_index == step:
+            end = yield from _walk(buffer, pos, steps, index + 1, need_end)
+            if end is None:
+                return None
+        else:
+            end = _skip_value(buffer, pos)
+        separator = _SEPARATOR.match(buffer, end) or _invalid(end)  # type: ignore[arg-type]  # `end` is only None if not `need_end`
+        if separator.group(1):
+            return separator.end() if need_end else None
+        pos = separator.end()
+        element_index += 1
+
+
+def _walk_array_from_end(buffer: Any, pos: int, steps: Tuple[object, ...], index: int, need_end: bool) -> _Walk:
+    # Used for the `[-N]` and slice steps that count from the end of the array
+    step = steps[index]
+    starts = []
+    pos = _skip_whitespace(buffer, pos + 1)
+    if buffer[pos : pos + 1] == b"]":
+        end = pos + 1
+    else:
+        while True:
+            starts.append(pos)
+            separator = _SEPARATOR.match(buffer, _skip_value(buffer, pos)) or _invalid(pos)
+            if separator.group(1):
+                end = separator.end()
+                break
+            pos = separator.end()
+    indices: Iterable[int]
+    if isinstance(step, Slice):
+        indices = step.indices(len(starts))
+    else:
+        from_start = len(starts) + step  # type: ignore[operator]  # `step` is a negative int
+        indices = [from_start] if from_start >= 0 else []
+    for element_index in indices:
+        yield from _walk(buffer, starts[element_index], steps, index + 1, need_end=False)
+    return end if need_end else None
+
+
+def _walk_object(buffer: Any, pos: int, steps: Tuple[object, ...], index: int, need_end: bool) -> _Walk:
+    step = steps[index]
+    found = False
+    pos = _skip_whitespace(buffer, pos + 1)
+    if buffer[pos : pos + 1] == b"}":
+        return pos + 1
+    while True:
+        key_match = _KEY.match(buffer, pos) or _invalid(pos)
+        pos = key_match.end()
+        if step is WILDCARD:
+            end = yield from _walk(buffer, pos, steps, index + 1, need_end=True)
+        elif not found and _decode_key(key_match.group(1)) == step:
+            found = True
+            end = yield from _walk(buffer, pos, steps, index + 1, need_end)
+            if end is None:
+                return None
+        else:
+            end = _skip_value(buffer, pos)
+        separator = _SEPARATOR.match(buffer, end) or _invalid(end)  # type: ignore[arg-type]  # `end` is only None if not `need_end`
+        if separator.group(1):
+            return separator.end() if need_end else None
+        pos = separator.end()
+
+
+def _walk_descendants(buffer: Any, pos: int, steps: Tuple[object, ...], index: int) -> Generator[Any, None, int]:
+    # Every value under a `..key` step needs to be scanned, so unlike the other walkers, this one can't stop early, and always
+    # returns the end position
+    key = steps[index].key  # type: ignore[attr-defined]
+    first = buffer[pos : pos + 1]
+    if first not in (b"[", b"{"):
+        return _skip_value(buffer, pos)
+    is_object = first == b"{"
+    pos = _skip_whitespace(buffer, pos + 1)
+    if buffer[pos : pos + 1] in (b"]", b"}"):
+        return pos + 1
+    while True:
+        if is_object:
+            key_match = _KEY.match(buffer, pos) or _invalid(pos)
+            pos = key_match.end()
+            if _decode_key(key_match.group(1)) == key:
+                # the value is selected, and then searched for more matches, like any other value
+                yield from _walk(buffer, pos, steps, index + 1, need_end=False)
+        end = yield from _walk_descendants(buffer, pos, steps, index)
+        separator = _SEPARATOR.match(buffer, end) or _invalid(end)
+        if separator.group(1):
+            return separator.end()
+        pos = separator.end()
+
+
+def _skip_value(buffer: Any, pos: int) -> int:
+    """
+    Returns the position just past the end of the JSON value that starts at `pos`.
+    """
+    first = buffer[pos : pos + 1]
+    if first == b'"':
+        return (_STRING.match(buffer, pos) or _invalid(pos)).end()
+    if first in (b"[", b"{"):
+        depth = 0
+        while True:
+            match = _CONTAINER.match(buffer, pos)
+            if match:
+                pos = match.end()
+                if depth == 0:
+                    return pos
+            else:
+                # too large or deeply nested for the regex, step into it
+                char = buffer[pos : pos + 1]
+                if char in (b"[", b"{"):
+                    depth += 1
+                    pos += 1
+                elif char in (b"]", b"}"):
+                    depth -= 1
+                    pos += 1
+                    if depth == 0:
+                        return pos
+                else:
+                    # `_CONTENT` stopped because it had matched as many strings as it could in one go
+                    pos = (_STRING.match(buffer, pos) or _invalid(pos)).end()
+            pos = _CONTENT.match(buffer, pos).end()  # type: ignore[union-attr]  # always matches
+    return (_SCALAR.match(buffer, pos) or _invalid(pos)).end()
+
+
+def _skip_whitespace(buffer: Any, pos: int) -> int:
+    return _WHITESPACE.match(buffer, pos).end()  # type: ignore[union-attr]  # always matches
+
+
+def _decode(raw: bytes) -> Any:
+    return _json_decode(bytes(raw).decode("UTF-8"))
+
+
+def _decode_key(raw: bytes) -> str:
+    if b"\\" in raw:
+        return json.loads(raw)
+    return raw[1:-1].decode("UTF-8")
+
+
+def _invalid(pos: int) -> NoReturn:
+    raise ValueError(f"Invalid JSON at byte {pos}")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+"""
+The steps that pods needles are parsed into (see the `pods` module), and how they select the nodes of in-memory Python objects.
+
+This is shared by the in-memory searches of the `pods` module, and by `pods_json`, which applies the remaining steps to the values
+it has to decode, e.g. the elements of a filtered list.
+"""
+
+# standards
+from collections.abc import Mapping, Sequence
+import operator
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# poisk
+from .validation import TypeSpec, type_checked
+
+
+CHILDREN = object()
+
+WILDCARD = object()
+
+_EXHAUSTED = object()
+
+_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class Predicate(NamedTuple):
+    """
+    The condition of a `[?...]` filter step, see the `pods` module. `operator` is None for existence checks.
+    """
+
+    path: Tuple[object, ...]
+    operator: Optional[str] = None
+    value: object = None
+
+    def matches(self, node: object) -> bool:
+        for key in self.path:
+            if not (isinstance(node, Mapping) and key in node):
+                return False
+            node = node[key]
+        if self.operator is None:
+            return True
+        # As in JSON, booleans aren't numbers: `true` equals neither 1 nor 1.0, and can't be ordered
+        if isinstance(node, bool) or isinstance(self.value, bool):
+            if self.operator not in ("==", "!="):
+                return False
+            if isinstance(node, bool) != isinstance(self.value, bool):
+                return self.operator == "!="
+        try:
+            return bool(_OPERATORS[self.operator](node, self.value))
+        except TypeError:
+            return False
+
+
+class Descendant(NamedTuple):
+    """
+    A `..key` step, see the `pods` module.
+    """
+
+    key: str
+
+
+class Slice(NamedTuple):
+    """
+    A `[start:stop:step]` step. Unlike `slice` objects, this can be hashed, and so used as a key in the caches.
+    """
+
+    start: Optional[int] = None
+    stop: Optional[int] = None
+    step: Optional[int] = None
+
+    def indices(self, length: int) -> range:
+        """
+        The indices selected in a sequence of `length` elements, in the order in which they're selected.
+        """
+        return range(*slice(*self).indices(length))
+
+
+def search_steps(steps: Tuple[object, ...], haystack: object, type: Optional[TypeSpec] = None) -> Iterator[object]:
+    """
+    Yields the nodes of `haystack` selected by `steps` (see `pods.PodsQuery`), checking that they match `type`, if given (see the
+    `validation` module).
+    """
+    results = _search_steps(steps, haystack)
+    return results if type is None else type_checked(results, type)
+
+
+def _search_steps(steps: Tuple[object, ...], haystack: object) -> Iterator[object]:
+    # The stack holds iterators over sibling nodes, each with the position in `steps` of the step to apply to them. Only steps that
+    # can select several nodes push onto it: other steps select a single child, which we descend into right away. So there's no
+    # allocation for each node visited, only for each fan-out.
+    end = len(steps)
+    stack = [(iter((haystack,)), 0)]
+    while stack:
+        nodes, pos = stack[-1]
+        node = next(nodes, _EXHAUSTED)
+        if node is _EXHAUSTED:
+            stack.pop()
+            continue
+        while pos < end:
+            step = steps[pos]
+            if step is CHILDREN:
+                if isinstance(node, Sequence) and not isinstance(node, str):
+                    stack.append((iter(node), pos + 1))
+                break
+            elif isinstance(step, Predicate):
+                if isinstance(node, Sequence) and not isinstance(node, str):
+                    # non-matching elements are skipped along with their whole subtree
+                    stack.append((filter(step.matches, node), pos + 1))
+                break
+            elif isinstance(step, Slice):
+                if isinstance(node, Sequence):  # see `has_index`
+                    stack.append((map(node.__getitem__, step.indices(len(node))), pos + 1))
+                break
+            elif step is WILDCARD:
+                if isinstance(node, Mapping):
+                    stack.append((iter(node.values()), pos + 1))
+                break
+            elif isinstance(step, Descendant):
+                stack.append((descendants(node, step.key), pos + 1))
+                break
+            elif (isinstance(node, Mapping) and step in node) or has_index(node, step):
+                node = node[step]  # type: ignore  # mypy gets confused but I think it's fine
+                pos += 1
+            else:
+                break
+        else:
+            yield node
+
+
+def has_index(node: object, index: object) -> bool:
+    """
+    Whether `index` is an int step that selects an element of `node`. As in Python, `[N]` and slices select the characters of a
+    string, whereas `[]` and `[?...]` only iterate over lists.
+    """
+    return isinstance(node, Sequence) and isinstance(index, int) and -len(node) <= index < len(node)
+
+
+def descendants(node: object, key: str) -> Iterator[object]:
+    """
+    Yields the values of `key` in all the dicts under `node`, including `node` itself, in document order.
+    """
+    # iterators over the children of each node on the current path, flagged with whether they iterate over a dict's items
+    stack: List[Tuple[Iterator[Any], bool]] = [(iter((node,)), False)]
+    while stack:
+        entries, are_items = stack[-1]
+        entry: Any = next(entries, _EXHAUSTED)
+        if entry is _EXHAUSTED:
+            stack.pop()
+            continue
+        if are_items:
+            entry_key, node = entry
+            if entry_key == key:
+                yield node
+        else:
+            node = entry
+        if isinstance(node, Mapping):
+            stack.append((iter(node.items()), True))
+        elif isinstance(node, Sequence) and not isinstance(node, str):
+            stack.append((iter(node), False))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""
+Caching of compiled regexes, and what the regex searches return for each match.
+
+The `re` module keeps its own cache of compiled patterns, but it's small, and when thousands of distinct needles are used (e.g. by
+many site-specific parsers running in the same process) it keeps overflowing, so that the same patterns get compiled again and
+again. So we keep our own bounded LRU cache, keyed on the pattern and the flags, whose size can be configured with `set_cache_size`.
+"""
+
+# standards
+from functools import lru_cache
+import re
+from typing import Any, AnyStr, Iterable, Match, Pattern, Union
+
+
+# How many compiled regexes `compile_regex` keeps around, by default
+REGEX_CACHE_SIZE = 4096
+
+
+def compile_regex(needle: Union[AnyStr, Pattern[AnyStr]], flags: int = 0) -> Pattern[AnyStr]:
+    """
+    Same as `re.compile`, but the most recently used patterns are cached.
+    """
+    if isinstance(needle, re.Pattern):
+        # already compiled. `re` checks that we don't also have flags
+        return re.compile(needle, flags)
+    return _compile_regex_cached(needle, flags)
+
+
+def cache_info():
+    """
+    Hit/miss statistics for the cache of compiled regexes, as a `functools._CacheInfo` named tuple.
+    """
+    return _compile_regex_cached.cache_info()
+
+
+def findall_value(match: Match) -> Any:
+    """
+    The value that `re.findall` would return for `match`: the whole match if the regex has no groups, the group if it has one, and
+    a tuple of the groups otherwise. Unmatched groups are empty strings, of the same type as the pattern.
+    """
+    groups = match.groups(b"" if isinstance(match.re.pattern, bytes) else "")
+    if not groups:
+        return match.group()
+    if len(groups) == 1:
+        return groups[0]
+    return groups
+
+
+def cache_clear() -> None:
+    _compile_regex_cached.cache_clear()
+
+
+def set_cache_size(maxsize: int) -> None:
+    """
+    Changes how many compiled regexes are kept in the cache. This empties it.
+    """
+    global _compile_regex_cached  # pylint: disable=global-statement,invalid-name
+    _compile_regex_cached = lru_cache(maxsize=maxsize)(re.compile)
+
+
+def cache_warm(needles: Iterable[Union[str, bytes]], flags: int = 0) -> None:
+    """
+    Compiles `needles` ahead of time, e.g. at startup, so that the first searches don't have to.
+    """
+    for needle in needles:
+        _compile_regex_cached(needle, flags)
+
+
+_compile_regex_cached = lru_cache(maxsize=REGEX_CACHE_SIZE)(re.compile)
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 # standards
-import re
-from typing import Any, Callable, TypeVar, Union
+from typing import Any, Callable, Pattern, TypeVar, Union
 
 # 3rd parties
 from typing_extensions import Protocol  # for pre-3.8 pythons
 
+# poisk
+from .haystacks import BufferSource
+
 
 class HasXPathMethod(Protocol):
     @property
@@ -20,4 +22,10 @@ class HasXPathMethod(Protocol):
 XPathType = TypeVar("XPathType", bound=HasXPathMethod)
 
 
-RegexType = Union[str, re.Pattern]
+RegexType = Union[str, Pattern[str]]
+
+# Bytes regexes only search bytes, in memory or in a file, and find bytes
+BytesRegexType = Union[bytes, Pattern[bytes]]
+
+# Regexes can search str's, or bytes in memory or in a file, see `iter._buffer_re_matches`
+RegexHaystack = Union[str, BufferSource]
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+"""
+Checking that pods search results match the `type` given to the search functions.
+
+Besides a class, as accepted by `isinstance`, `type` can be:
+
+<> a tuple of specs, or a `Union`/`Optional` of them, which the result must match at least one of
+
+<> `List[X]`, `Sequence[X]` or `Tuple[X, ...]`, whose elements must all match `X`, or `Tuple[X, Y]`, for a tuple of exactly that
+   length
+
+<> `Dict[K, V]` or `Mapping[K, V]`, whose keys and values must all match `K` and `V`
+
+<> a `TypedDict` class, which must be a dict with all the required keys, and whose values for the declared keys must match the
+   declared types. Other keys are allowed.
+
+<> `Any`, or `None`
+
+A spec is compiled once into a plan, a tree of checkers that each know exactly what to test, and the compiled plans are cached, so
+that `typing` introspection doesn't happen on every search. Checking a result that's fine only runs the checkers' `matches` methods,
+which return a bool without keeping track of paths, and which look up the exact class of each value before calling `isinstance`,
+since with plain data it almost always matches. Only when a result doesn't match is it checked again, with `mismatches`, to find
+out where.
+
+Lazy searches, whose caller can stop early (`one` and `iter`), check the results as the search yields them, and raise a
+`ResultTypeError` as soon as one doesn't match. Searches that return all the results anyway (`many`) check them all first, and
+report all the mismatches in a single `ResultTypeError`.
+"""
+
+# standards
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+import typing
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Tuple, TypeVar, Union
+
+# 3rd parties
+from typing_extensions import get_args, get_origin  # for pre-3.8 pythons
+
+# poisk
+from .exceptions import ResultTypeError
+
+
+T = TypeVar("T")
+
+# How many compiled type specs `compile_type` keeps around
+TYPE_CACHE_SIZE = 256
+
+_NONE_TYPE = type(None)
+
+# Anything that `compile_type` accepts: a class, a tuple, or a `typing` construct, which mypy can't describe more precisely
+TypeSpec = Any
+
+
+class Mismatch(NamedTuple):
+    """
+    One value that doesn't match the type spec. `result` is the index of the search result it's in, and `path` the keys and
+    indexes that lead to it, within that result. `found` is the name of the value's class, or "nothing" for a missing key.
+    """
+
+    result: int
+    path: Tuple[object, ...]
+    expected: str
+    found: str
+
+
+# Yielded by the checkers' `mismatches` methods: the path to a value, what was expected there, and what was found
+_PathMismatch = Tuple[Tuple[object, ...], str, str]
+
+
+class _Checker(ABC):
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def matches(self, value: Any) -> bool: ...
+
+    def mismatches(self, value: Any, path: Tuple[object, ...]) -> Iterator[_PathMismatch]:
+        if not self.matches(value):
+            yield path, self.name, value.__class__.__name__
+
+
+class _AnyChecker(_Checker):
+    __slots__ = ()
+
+    def matches(self, value: Any) -> bool:
+        return True
+
+
+class _InstanceChecker(_Checker):
+    __slots__ = ("classes",)
+
+    def __init__(self, name: str, classes: Tuple[type, ...]):
+        super().__init__(name)
+        self.classes = classes
+
+    def matches(self, value: Any) -> bool:
+        # `in` compares the classes by identity first, which is cheaper than `isinstance`
+        return value.__class__ in self.classes or isinstance(value, self.classes)
+
+
+class _UnionChecker(_Checker):
+    __slots__ = ("options",)
+
+    def __init__(self, name: str, options: Tuple[_Checker, ...]):
+        super().__init__(name)
+        self.options = options
+
+    def matches(self, value: Any) -> bool:
+        return any(option.matches(value) for option in self.options)
+
+
+class _SequenceChecker(_Checker):
+    __slots__ = ("classes", "element")
+
+    def __init__(self, name: str, classes: Tuple[type, ...], element: _Checker):
+        super().__init__(name)
+        self.classes = classes
+        self.element = element
+
+    def matches(self, value: Any) -> bool:
+        if not isinstance(value, self.classes) or isinstance(value, str):
+            return False
+        return all(map(self.element.matches, value))  # type: ignore[call-overload]  # `value` is narrowed to `object`
+
+    def mismatches(self, value: Any, path: Tuple[object, ...]) -> Iterator[_PathMismatch]:
+        if not isinstance(value, self.classes) or isinstance(value, str):
+            yield path, self.name, value.__class__.__name__
+            return
+        for index, element in enumerate(value):  # type: ignore[var-annotated, arg-type]
+            yield from self.element.mismatches(element, path + (index,))
+
+
+class _FixedTupleChecker(_Checker):
+    __slots__ = ("elements",)
+
+    def __init__(self, name: str, elements: Tuple[_Checker, ...]):
+        super().__init__(name)
+        self.elements = elements
+
+    def matches(self, value: Any) -> bool:
+        return (
+            isinstance(value, tuple)
+            and len(value) == len(self.elements)
+            and all(element.matches(item) for element, item in zip(self.elements, value))
+        )
+
+    def mismatches(self, value: Any, path: Tuple[object, ...]) -> Iterator[_PathMismatch]:
+        if not isinstance(value, tuple) or len(value) != len(self.elements):
+            yield path, self.name, value.__class__.__name__ if not isinstance(value, tuple) else f"tuple of length {len(value)}"
+            return
+        for index, (element, item) in enumerate(zip(self.elements, value)):
+            yield from element.mismatches(item, path + (index,))
+
+
+class _MappingChecker(_Checker):
+    __slots__ = ("classes", "key", "value")
+
+    def __init__(self, name: str, classes: Tuple[type, ...], key: _Checker, value: _Checker):
+        super().__init__(name)
+        self.classes = classes
+        self.key = key
+        self.value = value
+
+    def matches(self, value: Any) -> bool:
+        if not isinstance(value, self.classes):
+            return False
+        key_matches = self.key.matches
+        value_matches = self.value.matches
+        return all(key_matches(key) and value_matches(item) for key, item in value.items())  # type: ignore[attr-defined]
+
+    def mismatches(self, value: Any, path: Tuple[object, ...]) -> Iterator[_PathMismatch]:
+        if not isinstance(value, self.classes):
+            yield path, self.name, value.__class__.__name__
+            return
+        for key, item in value.items():  # type: ignore[attr-defined]
+            for key_path, expected, found in self.key.mismatches(key, path + (key,)):
+                yield key_path, f"key of type {expected}", found
+            yield from self.value.mismatches(item, path + (key,))
+
+
+class _TypedDictChecker(_Checker):
+    __slots__ = ("required", "fields")
+
+    def __init__(self, name: str, required: FrozenSet[str], fields: Dict[str, _Checker]):
+        super().__init__(name)
+        self.required = required
+        self.fields = fields
+
+    def matches(self, value: Any) -> bool:
+        if not isinstance(value, dict) or not all(key in value for key in self.required):
+            return False
+        return all(key not in value or checker.matches(value[key]) for key, checker in self.fields.items())
+
+    def mismatches(self, value: Any, path: Tuple[object, ...]) -> Iterator[_PathMismatch]:
+        if not isinstance(value, dict):
+            yield path, self.name, value.__class__.__name__
+            return
+        for key, checker in self.fields.items():
+            if key in value:
+                yield from checker.mismatches(value[key], path + (key,))
+            elif key in self.required:
+                yield path + (key,), checker.name, "nothing"
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def compile_type(spec: TypeSpec) -> _Checker:
+    """
+    Compiles a type spec (see the module docstring) into a plan that can check values against it. The most recently used plans are
+    cached. Raises `TypeError` if the spec isn't supported.
+    """
+    if spec is Any:
+        return _AnyChecker("Any")
+    if spec is None or spec is _NONE_TYPE:
+        return _InstanceChecker("None", (_NONE_TYPE,))
+    if isinstance(spec, tuple) or get_origin(spec) is Union:
+        return _compile_union(spec if isinstance(spec, tuple) else get_args(spec))
+    if _is_typed_dict(spec):
+        hints = typing.get_type_hints(spec)
+        required = getattr(spec, "__required_keys__", frozenset(hints) if spec.__total__ else frozenset())
+        return _TypedDictChecker(spec.__name__, frozenset(required), {key: compile_type(hint) for key, hint in hints.items()})
+    origin = get_origin(spec)
+    if origin is None:
+        if not isinstance(spec, type):
+            raise TypeError(f"Unsupported type spec: {spec!r}")
+        return _InstanceChecker(spec.__name__, (spec,))
+    args = get_args(spec)
+    if origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+        element = compile_type(args[0])
+        return _SequenceChecker(_generic_name(spec, [element.name, "..."]), (tuple,), element)
+    if origin is tuple:
+        elements = tuple(compile_type(arg) for arg in args)
+        return _FixedTupleChecker(_generic_name(spec, [element.name for element in elements]), elements)
+    if isinstance(origin, type) and issubclass(origin, Mapping):
+        key, value = (compile_type(arg) for arg in args or (Any, Any))
+        return _MappingChecker(_generic_name(spec, [key.name, value.name]), (origin,), key, value)
+    if isinstance(origin, type) and issubclass(origin, Sequence):
+        (element,) = (compile_type(arg) for arg in args or (Any,))
+        return _SequenceChecker(_generic_name(spec, [element.name]), (origin,), element)
+    raise TypeError(f"Unsupported type spec: {spec!r}")
+
+
+def type_checked(results: Iterable[T], spec: TypeSpec, with_paths: bool = False) -> Iterator[T]:
+    """
+    Yields the `results`, as the search produces them, and raises a `ResultTypeError` as soon as one doesn't match `spec`. If
+    `with_paths` is set, the results are `(path, value)` pairs, and only the values are checked.
+    """
+    checker = compile_type(spec)
+    matches = checker.matches
+    for index, result in enumerate(results):
+        value = result[1] if with_paths else result  # type: ignore[index]
+        if not matches(value):
+            raise ResultTypeError(checker.name, _mismatches(checker, index, value))
+        yield result
+
+
+def all_type_checked(results: Iterable[T], spec: TypeSpec, with_paths: bool = False) -> List[T]:
+    """
+    Same as `type_checked`, but returns all the `results` in a list, and the `ResultTypeError` is only raised once they've all been
+    checked, listing all the mismatches.
+    """
+    checker = compile_type(spec)
+    matches = checker.matches
+    checked = list(results)
+    mismatches: List[Mismatch] = []
+    for index, result in enumerate(checked):
+        value = result[1] if with_paths else result  # type: ignore[index]
+        if not matches(value):
+            mismatches.extend(_mismatches(checker, index, value))
+    if mismatches:
+        raise ResultTypeError(checker.name, mismatches)
+    return checked
+
+
+def _mismatches(checker: _Checker, index: int, value: Any) -> List[Mismatch]:
+    return [Mismatch(index, *mismatch) for mismatch in checker.mismatches(value, ())]
+
+
+def _compile_union(specs: Tuple[Any, ...]) -> _Checker:
+    checkers = [compile_type(spec) for spec in specs]
+    name = " | ".join(checker.name for checker in checkers)
+    # plain classes are all checked with a single `isinstance` call
+    classes = tuple(cls for checker in checkers if isinstance(checker, _InstanceChecker) for cls in checker.classes)
+    others = tuple(checker for checker in checkers if not isinstance(checker, _InstanceChecker))
+    if any(isinstance(checker, _AnyChecker) for checker in others):
+        return _AnyChecker(name)
+    if not others:
+        return _InstanceChecker(name, classes)
+    if classes:
+        others = (_InstanceChecker(name, classes),) + others
+    return _UnionChecker(name, others)
+
+
+def _is_typed_dict(spec: Any) -> bool:
+    return isinstance(spec, type) and issubclass(spec, dict) and hasattr(spec, "__total__") and hasattr(spec, "__annotations__")
+
+
+def _generic_name(spec: Any, arg_names: List[str]) -> str:
+    # e.g. "List[Location]" rather than the repr's "typing.List[my.module.Location]"
+    return repr(spec).split("[")[0].rsplit(".", 1)[-1] + "[" + ", ".join(arg_names) + "]"
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+"""
+Translation of `etree` needles (CSS selectors or XPath expressions) to XPath, and caching of the compiled expressions.
+
+Translating a CSS selector is comparatively slow, and so is having lxml parse an XPath expression, so both are done once per needle
+and kept in a bounded LRU cache. The cache is keyed on the needle, its `kind`, and the options that lxml needs at compile time
+(namespaces, extensions, smart_strings). Any other keyword argument is an XPath variable, and is passed in at evaluation time.
+
+A needle's kind is one of `NEEDLE_KINDS`:
+
+<> "css": a CSS selector, e.g. "p.title > b"
+
+<> "xpath": an XPath expression that is only allowed to select nodes within the haystack's subtree. It's rewritten to start with
+   "./" or ".//", e.g. "//p" becomes ".//p", "/p" becomes "./p" and "p/b" becomes ".//p/b".
+
+<> "absolute_xpath": an XPath expression that's used as is, and so can e.g. search the whole document ("//title") or go up the
+   tree ("../p")
+
+If no kind is given, it is guessed from the needle: anything that contains "/", "@" or "()" is taken to be an "xpath", anything
+else a "css" selector. Since the guess is cached along with the compiled needle, it only costs something the first time.
+
+Regarding threads: lxml documents can be searched from several threads at once, and lxml releases the GIL while it evaluates an
+XPath expression. But an `lxml.etree.XPath` object holds a lock while it's being evaluated, so sharing one between threads would
+serialise their searches. So although `XPathQuery` objects (and therefore the cache) are shared by all threads, each thread compiles
+its own `lxml.etree.XPath` object, on first use. `XPathQuery` objects are therefore safe to share between threads, and searches with
+them do run in parallel; see `batch.etree_many_concurrent`.
+"""
+
+# standards
+from functools import lru_cache
+import re
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# 3rd parties
+from cssselect import HTMLTranslator
+
+try:
+    import lxml.etree as ET
+except ImportError:  # pragma: no cover
+    # lxml isn't a hard requirement, any object with an `xpath` method can be searched, it just won't benefit from compiled queries
+    ET = None  # type: ignore[assignment]
+
+
+# How many compiled needles `compile_xpath` keeps around
+XPATH_CACHE_SIZE = 1024
+
+# Kwargs to `xpath()` that are compile-time options rather than XPath variables
+COMPILE_OPTIONS = ("namespaces", "extensions", "smart_strings")
+
+NEEDLE_KINDS = ("css", "xpath", "absolute_xpath")
+
+
+_css_to_xpath = HTMLTranslator().css_to_xpath
+
+_RE_XPATH_SYNTAX = re.compile(r"[@/]|\(\)")
+
+
+class XPathQuery:
+    """
+    An `etree` needle translated to XPath, and, when lxml is available, compiled into an `lxml.etree.XPath` object.
+
+    The compiled object is used for lxml elements and trees. Other haystacks only need to have an `xpath` method, so for them we
+    fall back to calling that with the translated expression. There is one compiled object per thread, see the module docstring.
+    """
+
+    __slots__ = ("needle", "kind", "xpath", "options", "_local")
+
+    def __init__(self, needle: str, kind: Optional[str] = None, **options):
+        if kind is None:
+            kind = "xpath" if _RE_XPATH_SYNTAX.search(needle) else "css"
+        elif kind not in NEEDLE_KINDS:
+            raise ValueError(f"Unknown needle kind: {kind!r}, expected one of {NEEDLE_KINDS!r}")
+        self.needle = needle
+        self.kind = kind
+        self.xpath = _needle_to_xpath(needle, kind)
+        self.options: Dict[str, Any] = options
+        self._local = threading.local()
+        if ET is not None:
+            # compiled right away in the calling thread, so that errors in the expression are raised here
+            self._local.compiled = ET.XPath(self.xpath, **options)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.needle!r})"
+
+    @property
+    def compiled(self) -> Any:
+        """
+        This thread's `lxml.etree.XPath` object, or None if lxml isn't available.
+        """
+        if ET is None:
+            return None
+        try:
+            return self._local.compiled
+        except AttributeError:
+            compiled = self._local.compiled = ET.XPath(self.xpath, **self.options)
+            return compiled
+
+    def search(self, haystack: Any, **variables) -> Any:
+        if ET is not None and isinstance(haystack, (ET._Element, ET._ElementTree)):  # pylint: disable=protected-access
+            return self.compiled(haystack, **variables)
+        return haystack.xpath(self.xpath, **self.options, **variables)
+
+
+def compile_xpath(needle: str, kind: Optional[str] = None, **options) -> XPathQuery:
+    """
+    Returns an `XPathQuery` for the given needle, `kind` (see `NEEDLE_KINDS`, guessed if None) and compile-time `options` (see
+    `COMPILE_OPTIONS`). The most recently used queries are cached.
+    """
+    try:
+        key = tuple(sorted((name, _freeze(value)) for name, value in options.items()))
+        hash(key)
+    except TypeError:
+        # e.g. an extension function that's not hashable. We can still run the query, we just can't cache it
+        return XPathQuery(needle, kind, **options)
+    return _compile_xpath_cached(needle, kind, key)
+
+
+def xpath_search(needle: str, haystack: Any, kind: Optional[str] = None, **kwargs) -> Any:
+    """
+    Evaluates `needle` over `haystack`, same as `haystack.xpath(...)` would, but using a cached compiled query.
+    """
+    options = {name: kwargs.pop(name) for name in COMPILE_OPTIONS if name in kwargs}
+    return compile_xpath(needle, kind, **options).search(haystack, **kwargs)
+
+
+def cache_info():
+    """
+    Hit/miss statistics for the cache of compiled queries, as a `functools._CacheInfo` named tuple.
+    """
+    return _compile_xpath_cached.cache_info()
+
+
+def cache_clear() -> None:
+    _compile_xpath_cached.cache_clear()
+
+
+@lru_cache(maxsize=XPATH_CACHE_SIZE)
+def _compile_xpath_cached(needle: str, kind: Optional[str], key: Tuple[Tuple[str, Hashable], ...]) -> XPathQuery:
+    return XPathQuery(needle, kind, **{name: _thaw(value) for name, value in key})
+
+
+def _needle_to_xpath(needle: str, kind: str) -> str:
+    if kind == "css":
+        return _css_to_xpath(needle)
+    if kind == "xpath" and not needle.startswith("./"):
+        # XPath is able to search outside of a given node's subtree. We don't want that, we only want to search the subtree. If the
+        # path doesn't already start with "./", prepend a dot, and slashes if there weren't already some.
+        return "." + needle if needle.startswith("/") else ".//" + needle
+    return needle
+
+
+class _FrozenDict(tuple):
+    # a hashable stand-in for the `namespaces` and `extensions` dicts, so that they can be part of the cache key
+    pass
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return _FrozenDict(sorted(value.items(), key=repr))
+    return value
+
+
+def _thaw(value: Optional[Hashable]) -> Any:
+    if isinstance(value, _FrozenDict):
+        return dict(value)
+    return value
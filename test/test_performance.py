@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+# standards
+from collections.abc import Mapping, Sequence
+import json
+from pathlib import Path
+import subprocess
+import sys
+from time import perf_counter
+import tracemalloc
+
+# 3rd parties
+import pytest
+
+# poisk
+from poisk import compile_pods, many, one
+from poisk.pods import CHILDREN
+
+
+def legacy_pods_search(steps, haystack):
+    """
+    The walker that `PodsQuery.iter_search` replaced, kept here as a baseline. It copies the remaining steps for every node visited.
+    """
+    results = []
+    stack = [(haystack, list(steps))]
+    while stack:
+        node, steps = stack.pop()
+        if not steps:
+            results.append(node)
+        else:
+            head, *tail = steps
+            if head is CHILDREN:
+                if isinstance(node, Sequence) and not isinstance(node, str):
+                    for element in reversed(node):
+                        stack.append((element, tail))
+            elif (isinstance(node, Mapping) and head in node) or (
+                isinstance(node, Sequence) and isinstance(head, int) and 0 <= head < len(node)
+            ):
+                stack.append((node[head], tail))
+    return results
+
+
+def measure(function, *args):
+    """
+    Returns the result of calling `function`, the wall time it took (without tracing), and the peak memory allocated while running
+    it, not counting the result list itself, if it returns a list.
+    """
+    start = perf_counter()
+    function(*args)
+    wall_time = perf_counter() - start
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, wall_time, peak - (len(result) * 8 if isinstance(result, list) else 0)
+
+
+@pytest.mark.parametrize(
+    "needle, width, depth",
+    [
+        ("a[].b[].c", 5_000, 20),
+        ("a[].x.y.z.b[].c", 5_000, 20),
+    ],
+)
+def test_pods_search_allocations(needle, width, depth):
+    record = {"b": [{"c": i} for i in range(depth)]}
+    haystack = {"a": [{"x": {"y": {"z": record}}, **record}] * width}
+    query = compile_pods(needle)
+    new_results, new_time, new_peak = measure(query.search, haystack)
+    old_results, old_time, old_peak = measure(legacy_pods_search, query.steps, haystack)
+    print(f"{needle}: {old_time:.3f}s -> {new_time:.3f}s, peak allocations {old_peak:,} -> {new_peak:,} bytes")
+    assert new_results == old_results
+    assert len(new_results) == width * depth
+    # the legacy walker keeps a copy of the remaining steps for each node pending on its stack, the new one only needs memory
+    # proportional to the depth of the haystack
+    assert new_peak * 10 < old_peak
+
+
+def test_pods_over_json_file_memory(tmp_path):
+    path = tmp_path / "large.json"
+    records = [{"id": i, "name": f"record {i}", "values": list(range(20))} for i in range(20_000)]
+    path.write_text(json.dumps({"payload": {"results": records, "total": len(records)}}), "UTF-8")
+    # the file is memory-mapped, and only the results are decoded, so peak memory is proportional to the size of the results, not
+    # of the file
+    total, _, total_peak = measure(one.pods, "payload.total", path)
+    assert total == 20_000
+    assert total_peak < 1_000_000 < path.stat().st_size
+    ids, _, ids_peak = measure(many.pods, "payload.results[].id", path)
+    assert ids == list(range(20_000))
+    assert ids_peak < 2 * sum(map(sys.getsizeof, ids))
+
+
+def test_benchmarks_run(tmp_path):
+    # only checks that the benchmark suite still runs, at a tiny scale
+    script = Path(__file__).parent.parent / "benchmarks" / "run_benchmarks.py"
+    output = tmp_path / "results.json"
+    subprocess.run([sys.executable, str(script), "--scales", "10", "--repeat", "1", "--json", str(output)], check=True)
+    results = json.loads(output.read_text("UTF-8"))
+    assert {result["scale"] for result in results} == {10}
+    assert all(result["seconds"] > 0 and result["peak_bytes"] > 0 for result in results)
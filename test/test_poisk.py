@@ -3,15 +3,34 @@
 # pylint: disable=line-too-long
 
 # standards
+from collections import OrderedDict
 from collections.abc import Mapping, Sequence
+import array
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+import itertools
+import json
+import mmap
+import pickle
 import re
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Sequence as SequenceType, Tuple, TypedDict, Union
 
 # 3rd parties
+from cssselect import SelectorError
 import lxml.etree as ET
 import pytest
 
 # poisk
-from poisk import ManyFound, NotFound, many, one
+from poisk import Extractor, Field, ManyFound, NotFound, ResultTypeError, compile_pods, compile_xpath, extract, pods_get
+from poisk import aio, batch, instrumentation, many, one, regex, xpath
+from poisk import cache_clear, cache_info, cache_warm
+from poisk import iter as poisk_iter
+from poisk.haystacks import NODE_SIZE, estimate_size
+from poisk.pods import CHILDREN, PodsIndex, PodsQuerySet
+from poisk.validation import Mismatch, compile_type
 
 
 HTML_DOC = ET.HTML(
@@ -327,3 +346,1112 @@ def test_find_all(find, haystack, needle, options, expected):
             for element in results
         ]
         assert results == expected
+
+
+def test_compile_pods():
+    query = compile_pods("payload.results[].id")
+    assert query.steps == ("payload", "results", CHILDREN, "id")
+    assert query.search({"payload": {"results": [{"id": 1}, {"id": 2}]}}) == [1, 2]
+    assert query.search({"payload": {}}) == []
+    with pytest.raises(TypeError):
+        query.search({"payload": {"results": [{"id": 1}]}}, type=str)
+
+
+def test_compile_pods_is_cached():
+    compile_pods.cache_clear()
+    assert compile_pods("a.b") is compile_pods("a.b")
+    one.pods("a.b", {"a": {"b": 1}})
+    many.pods("a.b", {"a": {"b": 1}})
+    info = compile_pods.cache_info()
+    assert (info.hits, info.misses) == (3, 1)
+
+
+def test_one_stops_after_second_match():
+    assert one.filter(lambda i: i > 2, itertools.count(), allow_many=True) == 3
+    with pytest.raises(ManyFound):
+        one.filter(lambda i: i > 2, itertools.count())
+    with pytest.raises(ManyFound):
+        one.filter(lambda i: i > 2, itertools.chain([1, 1, 3, 3, 4], itertools.count()), allow_duplicates=True)
+    parsed = []
+    with pytest.raises(ManyFound):
+        one.pods("[].v", [{"v": i} for i in range(100)], parse=parsed.append)
+    assert len(parsed) == 2
+
+
+@pytest.mark.parametrize(
+    "needle, haystack",
+    [
+        (r"b", "abracadabra"),
+        (r"(b)", "abracadabra"),
+        (r"(x)?b", "abracadabra"),
+        (r"(a)(b)?", "abracadabra"),
+    ],
+)
+def test_one_re_matches_findall(needle, haystack):
+    assert one.re(needle, haystack, allow_many=True) == re.findall(needle, haystack)[0]
+
+
+class Text(str):
+    pass
+
+
+@pytest.mark.parametrize(
+    "needle, options",
+    [
+        (r"b(.)", {}),
+        (r"b(.)", {"allow_duplicates": True}),
+        (r"b(.)", {"allow_many": True, "parse": str.upper}),
+        (r"(.)b(.)", {"allow_duplicates": True}),
+        (r"c|d", {}),
+        (r"c|d", {"parse": len, "allow_duplicates": True}),
+        (r"x", {}),
+        (r"x", {"allow_mismatch": True}),
+        (r"", {"allow_many": True}),
+    ],
+)
+def test_one_re_str_fast_path(needle, options):
+    # plain str haystacks are searched without going through `iter.re`, str subclasses aren't
+    outcomes = []
+    for haystack in ("abracadabra", Text("abracadabra")):
+        try:
+            outcomes.append(one.re(needle, haystack, **options))
+        except (NotFound, ManyFound) as error:
+            outcomes.append(type(error))
+    assert outcomes[0] == outcomes[1]
+
+
+@pytest.mark.parametrize(
+    "find, haystack, needle, options",
+    [
+        (poisk_iter.re, "abracadabra", r"(.)a(.)", {}),
+        (poisk_iter.re, "abracadabra", r"z", {"allow_mismatch": True}),
+        (poisk_iter.re, "in my honest opinion", r"\b\w", {"parse": str.upper}),
+        (poisk_iter.etree, HTML_DOC, "body/p/text()", {}),
+        (poisk_iter.etree, HTML_DOC, "p", {"parse": ET.tostring}),
+        (poisk_iter.pods, {"v": [[0, 1], [2, 3], [4, 5]]}, "v[][0]", {}),
+        (poisk_iter.pods, {"list": []}, "list[]", {"allow_mismatch": True}),
+        (poisk_iter.filter, list(range(10)), lambda i: i % 3 == 0, {}),
+    ],
+)
+def test_find_iter(find, haystack, needle, options):
+    results = find(needle, haystack, **options)
+    assert not isinstance(results, list)
+    assert list(results) == getattr(many, find.__name__)(needle, haystack, **options)
+
+
+def test_iter_raises_not_found_before_iterating():
+    with pytest.raises(NotFound):
+        poisk_iter.pods("list[]", {"list": []})
+    with pytest.raises(NotFound):
+        poisk_iter.filter(bool, [0, None])
+
+
+def test_iter_is_lazy():
+    evens = poisk_iter.filter(lambda i: i % 2 == 0, itertools.count(1), parse=str)
+    assert list(itertools.islice(evens, 3)) == ["2", "4", "6"]
+
+
+def test_compiled_xpath_is_cached():
+    xpath.cache_clear()
+    needle = "x:foo/y:bar/text()"
+    namespaces = {"x": "http://xml.com/ns1", "y": "http://xml.com/ns2"}
+    assert compile_xpath("p b") is compile_xpath("p b")
+    assert compile_xpath(needle, namespaces=namespaces) is compile_xpath(needle, namespaces=dict(namespaces))
+    assert compile_xpath(needle, namespaces=namespaces) is not compile_xpath(needle, namespaces={**namespaces, "z": "urn:z"})
+    for _ in range(3):
+        assert one.etree(needle, XML_DOC, namespaces=namespaces) == "Text"
+        assert one.etree("//p[@id = $my_var]/b/text()", HTML_DOC, my_var="first") == "forban"
+    info = xpath.cache_info()
+    assert (info.hits, info.misses) == (8, 4)
+
+
+def test_compiled_xpath_is_thread_safe():
+    needles = [f"p:nth-child({i % 2 + 1})" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda needle: one.etree(needle, HTML_DOC).get("id"), needles))
+    assert results == ["first" if i % 2 == 0 else None for i in range(200)]
+
+
+def test_compiled_regex_is_cached():
+    regex.cache_clear()
+    assert regex.compile_regex(r"b(.)") is regex.compile_regex(r"b(.)")
+    assert regex.compile_regex(r"b(.)") is not regex.compile_regex(r"b(.)", re.I)
+    for _ in range(3):
+        assert many.re(r"b(.)", "abracadabra") == ["r", "r"]
+        assert one.re(r"C(.)", "abracadabra", flags=re.I) == "a"
+    info = regex.cache_info()
+    assert (info.hits, info.misses) == (7, 3)
+    compiled = re.compile(r"b(.)")
+    assert regex.compile_regex(compiled) is compiled
+    with pytest.raises(ValueError):
+        many.re(compiled, "abracadabra", flags=re.I)
+
+
+def test_regex_cache_size():
+    try:
+        regex.set_cache_size(2)
+        for needle in ("a", "b", "c", "a"):
+            regex.compile_regex(needle)
+        info = regex.cache_info()
+        assert (info.hits, info.misses, info.maxsize, info.currsize) == (0, 4, 2, 2)
+    finally:
+        regex.set_cache_size(regex.REGEX_CACHE_SIZE)
+
+
+def test_cache_warm():
+    cache_clear()
+    cache_warm(re=[r"\d+", r"\w+"], pods=["a.b"], etree=["p b"])
+    assert {name: info.currsize for name, info in cache_info().items()} == {"re": 2, "etree": 1, "pods": 1}
+    assert many.re(r"\d+", "1 2") == ["1", "2"]
+    assert one.pods("a.b", {"a": {"b": 1}}) == 1
+    assert one.etree("p b", HTML_DOC, allow_many=True).text == "forban"
+    assert {name: info.hits for name, info in cache_info().items()} == {"re": 1, "etree": 1, "pods": 1}
+
+
+class ItemsCounter(dict):
+    calls = 0
+
+    def items(self):
+        ItemsCounter.calls += 1
+        return super().items()
+
+
+def test_exception_message_is_lazy():
+    haystack = {"payload": ItemsCounter(total=3)}
+    with pytest.raises(NotFound) as raised:
+        one.pods("payload.missing", haystack)
+    assert ItemsCounter.calls == 0
+    assert str(raised.value) == "'payload.missing' in {'payload': {'total': 3}}"
+    assert raised.value.args == ("'payload.missing' in {'payload': {'total': 3}}",)
+    assert ItemsCounter.calls == 1
+
+
+class UnreprableDict(dict):
+    def __repr__(self):
+        raise AssertionError("the complete repr shouldn't be built")
+
+
+class UnreprableList(list):
+    def __repr__(self):
+        raise AssertionError("the complete repr shouldn't be built")
+
+
+@pytest.mark.parametrize(
+    "haystack, expected",
+    [
+        pytest.param(
+            "abc" * 100_000,
+            "'x' in 'abcabcabcabcabcabcabcabcabcabcabcabcabcabcabcabca…cabcabcabcabcabcabcabcabcabcabcabcabcabcabcabcabc'",
+            id="long str",
+        ),
+        pytest.param([1] * 100_000, "'x' in [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, ...]", id="long list"),
+        pytest.param({"a": {"b": {"c": {"d": 1}}}}, "'x' in {'a': {'b': {'c': {...}}}}", id="deep dict"),
+        pytest.param({"b": 1, "a": 2}, "'x' in {'b': 1, 'a': 2}", id="dict order"),
+        pytest.param(12, "'x'", id="int"),
+        pytest.param(
+            OrderedDict((i, i) for i in range(100_000)),
+            "'x' in {0: 0, 1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 7: 7, 8: 8, 9: 9, ...}",
+            id="OrderedDict",
+        ),
+        pytest.param([UnreprableDict(a=[1] * 100)], "'x' in [{'a': [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, ...]}]", id="dict subclass"),
+        pytest.param(MappingProxyType({"a": 1}), "'x' in {'a': 1}", id="mapping"),
+        pytest.param((UnreprableList(range(100)),), "'x' in ([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ...],)", id="list subclass"),
+        pytest.param(frozenset(), "'x' in frozenset()", id="empty frozenset"),
+        pytest.param(
+            [dict.fromkeys(range(100_000), 1).values()],
+            "'x' in [dict_values([1, 1, 1, 1, 1, 1, 1, 1, 1, 1, ...])]",
+            id="other collection",
+        ),
+    ],
+)
+def test_exception_message_is_bounded(haystack, expected):
+    assert str(NotFound("x", haystack)) == expected
+
+
+def test_exception_can_be_pickled():
+    error = pickle.loads(pickle.dumps(ManyFound("x", [1, 2])))
+    assert isinstance(error, ManyFound)
+    assert (error.needle, error.haystack, str(error)) == ("x", [1, 2], "'x' in [1, 2]")
+
+
+EXTRACT_DATA = {
+    "payload": {
+        "total": 3,
+        "results": [{"id": 1, "tags": ["a"]}, {"id": 2}, {"id": 3, "tags": ["b", "c"]}],
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "field, expected",
+    [
+        ("payload.total", 3),
+        (Field("payload.total", parse=str), "3"),
+        ("payload.results[].id", ManyFound),
+        (Field("payload.results[].id", allow_many=True), 1),
+        (Field("payload.results[].id", many=True), [1, 2, 3]),
+        (Field("payload.results[].tags[]", many=True), ["a", "b", "c"]),
+        ("payload.missing", NotFound),
+        (Field("payload.missing", allow_mismatch=True), None),
+        (Field("payload.missing", many=True, allow_mismatch=True), []),
+    ],
+)
+def test_extract_field(field, expected):
+    # each field gets the same results as if it was searched for on its own, regardless of the other fields
+    spec = {"other": Field("payload.results[].id", many=True), "field": field, "total": "payload.total"}
+    if isinstance(expected, type) and issubclass(expected, Exception):
+        with pytest.raises(expected):
+            extract(spec, EXTRACT_DATA)
+    else:
+        assert extract(spec, EXTRACT_DATA) == {"other": [1, 2, 3], "field": expected, "total": 3}
+        assert extract(spec, json.dumps(EXTRACT_DATA).encode()) == {"other": [1, 2, 3], "field": expected, "total": 3}
+
+
+def test_extract_etree():
+    spec = {
+        "first": "p#first b",
+        "texts": Field("body/p/text()", many=True),
+        "var": "//p[@id = $my_var]/b/text()",
+    }
+    assert extract(spec, HTML_DOC, my_var="first") == {
+        "first": one.etree("p#first b", HTML_DOC),
+        "texts": ["Au large, ", "!", "Au large, flibustier!"],
+        "var": "forban",
+    }
+    assert Extractor({"text": "x:foo/y:bar/text()"}).extract(
+        XML_DOC,
+        namespaces={"x": "http://xml.com/ns1", "y": "http://xml.com/ns2"},
+    ) == {"text": "Text"}
+
+
+def test_pods_query_set_matches_individual_searches():
+    haystack = {"a": [{"b": [1, {"c": 2}], "c": 3}, [4, 5], {"b": [], "c": None}], "b": {"c": 6}, "0": "zero"}
+    needles = ["a", "a[]", "a[].b[]", "a[].b[].c", "a[].c", "a[][1]", "a[0].b", "b.c", "c", "[]", "a[0]", "'0'", "a.b", "a[]"]
+    query_set = PodsQuerySet(needles)
+    assert query_set.search(haystack) == [many.pods(needle, haystack, allow_mismatch=True) for needle in needles]
+    assert query_set.search(json.dumps(haystack).encode()) == query_set.search(haystack)
+    assert query_set.search(io.BytesIO(json.dumps(haystack).encode())) == query_set.search(haystack)
+
+
+JSON_DATA = {
+    "payload": {
+        "total": 3,
+        "results": [
+            {"id": 1, "name": 'a "quoted" [bracket] {brace} \\', "tags": ["x", "y"]},
+            {"id": 2, "name": "caf\u00e9", "tags": []},
+            {"id": 3, "nested": {"deep": [[1, 2], [3, [4, 5]]]}, "tags": ["z"]},
+        ],
+        "empty": {},
+        "null": None,
+        "flags": [True, False, -1.5e3],
+        "unicode key é": "value",
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "needle",
+    [
+        "payload",
+        "payload.total",
+        "payload.results[].id",
+        "payload.results[].name",
+        "payload.results[].tags[]",
+        "payload.results[2].nested.deep[][]",
+        "payload.results[2].nested.deep[1][1][0]",
+        "payload.results[9]",
+        "payload.results.id",
+        "payload.empty",
+        "payload.empty[]",
+        "payload.null",
+        "payload.flags[]",
+        "payload.total[]",
+        "'payload'.'unicode key é'",
+        "[]",
+        "missing",
+        "payload.results[?id >= 2].tags[]",
+        "payload.results[?nested].nested.deep[0]",
+        "payload.results[?name == 'café'].id",
+        "payload.flags[?x]",
+        "payload.results[-1].id",
+        "payload.results[-9]",
+        "payload.results[1:].id",
+        "payload.results[:-1].tags[-1]",
+        "payload.results[::-1].id",
+        "payload.results[-2::-2].id",
+        "payload.results[0].name[0]",
+        "payload.results[1].name[-1]",
+        "payload.results[0].name[1:]",
+        "payload.results[0].name[]",
+        "'payload'.'unicode key é'[0]",
+    ],
+)
+def test_pods_over_json_bytes(needle, tmp_path):
+    text = json.dumps(JSON_DATA, indent=2, ensure_ascii=False)
+    expected = many.pods(needle, JSON_DATA, allow_mismatch=True)
+    path = tmp_path / "data.json"
+    path.write_text(text, "UTF-8")
+    assert many.pods(needle, text.encode("UTF-8"), allow_mismatch=True) == expected
+    assert many.pods(needle, json.dumps(JSON_DATA, separators=(",", ":")).encode(), allow_mismatch=True) == expected
+    assert many.pods(needle, path, allow_mismatch=True) == expected
+    assert many.pods(needle, io.BytesIO(text.encode("UTF-8")), allow_mismatch=True) == expected
+    with path.open("rb") as file:
+        assert many.pods(needle, file, allow_mismatch=True) == expected
+
+
+def test_pods_over_json_bytes_stops_early():
+    document = b'{"payload": {"total": 3, "results": [1, 2]}, "rest": [this is never scanned'
+    assert one.pods("payload.total", document) == 3
+    assert many.pods("payload.results[]", document) == [1, 2]
+    with pytest.raises(ManyFound):
+        one.pods("payload.results[]", document)
+    with pytest.raises(ValueError):
+        many.pods("rest[]", document)
+    assert many.pods("payload.results[:1]", document) == [1]
+
+
+def test_pods_over_json_bytes_type_checks():
+    assert one.pods("a", b'{"a": 1}', type=int) == 1
+    with pytest.raises(TypeError):
+        one.pods("a", b'{"a": 1}', type=str)
+
+
+LOG_TEXT = "".join(f"2021-03-{day:02d} {level} café #{day}\n" for day in range(1, 21) for level in ("INFO", "WARN"))
+
+
+@pytest.mark.parametrize(
+    "needle, kwargs",
+    [
+        (r"WARN café #(\d+)", {}),
+        (r"(\d+)-(\d+)-(\d+) (ERROR)?", {}),
+        (r"^\S+ warn", {"flags": re.I | re.M}),
+        (re.compile(r"café #1\d$", flags=re.M), {}),
+        (r"ERROR", {}),
+    ],
+)
+def test_re_over_files(needle, kwargs, tmp_path):
+    expected = many.re(needle, LOG_TEXT, allow_mismatch=True, **kwargs)
+    path = tmp_path / "log.txt"
+    path.write_text(LOG_TEXT, "UTF-8")
+    assert many.re(needle, path, allow_mismatch=True, **kwargs) == expected
+    assert list(poisk_iter.re(needle, path, allow_mismatch=True, **kwargs)) == expected
+    assert many.re(needle, LOG_TEXT.encode("UTF-8"), allow_mismatch=True, **kwargs) == expected
+    with path.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        assert many.re(needle, buffer, allow_mismatch=True, **kwargs) == expected
+        assert one.re(needle, buffer, allow_many=True, allow_mismatch=True, **kwargs) == (expected[0] if expected else None)
+
+
+def test_re_over_files_keeps_semantics(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text(LOG_TEXT, "UTF-8")
+    assert one.re(r"WARN café #(\d+)", path, allow_many=True, parse=int) == 1
+    with pytest.raises(ManyFound):
+        one.re(r"WARN café #(\d+)", path)
+    with pytest.raises(NotFound):
+        one.re(r"ERROR", path)
+    # bytes needles give bytes results, as they would with `re`
+    assert many.re(rb"#(1\d)\n", path) == [b"%d" % day for day in range(10, 20) for _ in range(2)]
+
+
+class Record(dict):
+    def read(self):
+        raise AssertionError("not a file")
+
+
+def test_only_file_objects_are_read(tmp_path):
+    assert one.pods("a", Record(a=1)) == 1
+    path = tmp_path / "data.json"
+    path.write_text('{"a": 1}', "UTF-8")
+    with path.open("rb") as file:
+        assert one.pods("a", file) == 1
+    with path.open() as file:
+        assert one.re(r"\d", file) == "1"
+
+
+def test_re_over_files_with_non_ascii_text(tmp_path):
+    path = tmp_path / "menu.txt"
+    path.write_text("café crème\n", "UTF-8")
+    # str needles match characters, exactly as over a str
+    assert one.re(r"caf\w", path) == "café"
+    assert one.re(r"caf.", path) == "café"
+    assert many.re(r"\w+", path) == ["café", "crème"]
+    # bytes needles match bytes
+    assert one.re(rb"caf\S+", path) == "café".encode("UTF-8")
+    assert one.re(rb"caf.", path) == b"caf\xc3"
+    path.write_bytes("café\n".encode("latin-1"))
+    with pytest.raises(UnicodeDecodeError):
+        one.re(r"caf", path)
+    assert one.re(rb"caf.", path) == b"caf\xe9"
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+def test_re_over_file_closes_map_when_abandoned(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text(LOG_TEXT, "UTF-8")
+    matches = poisk_iter.re(r"#\d+", path)
+    assert next(matches) == "#1"
+    del matches  # closing the memory map would raise a BufferError if the regex scanner still held on to it
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_batch_map(executor):
+    haystacks = [{"id": i, "tags": ["x"] * (i % 3)} for i in range(50)]
+    spec = {"id": Field("id", parse=str), "tags": Field("tags[]", many=True)}
+    results = batch.map(spec, haystacks, workers=3, executor=executor, chunksize=4)
+    assert len(results) == 50
+    for i, result in enumerate(results):
+        if i % 3:
+            assert result == {"id": str(i), "tags": ["x"] * (i % 3)}
+        else:
+            assert isinstance(result, NotFound)
+            assert (result.needle, result.haystack) == ("tags[]", haystacks[i])
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_batch_map_etree(executor):
+    documents = [f"<ul>{'<li>item</li>' * i}</ul>" for i in range(10)]
+    results = batch.map({"item": "li/text()"}, documents, workers=2, executor=executor, load=ET.HTML)
+    assert [type(result) for result in results] == [NotFound, dict] + [ManyFound] * 8
+    assert results[1] == {"item": "item"}
+    # the exception holds the document as it was given, rather than the parsed tree, which can't be sent back from a process
+    assert results[2].haystack == documents[2]
+
+
+def test_batch_map_raises_other_errors():
+    with pytest.raises(ValueError):
+        batch.map({"a": "a"}, [{"a": 1}], executor="fibers")
+    with pytest.raises(TypeError):
+        batch.map({"a": Field("a", parse=len)}, [{"a": 1}], executor="thread")
+
+
+def test_compiled_xpath_per_thread():
+    query = compile_xpath("p b")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        compiled = list(executor.map(lambda _: id(query.compiled), range(4)))
+        results = list(executor.map(lambda _: [b.text for b in query.search(HTML_DOC)], range(100)))
+    # the query is shared, but each thread evaluates its own lxml object, since lxml serialises calls to any one XPath object
+    assert id(query.compiled) not in compiled
+    assert results == [["forban"]] * 100
+
+
+def test_etree_many_concurrent():
+    needles = ["p b", "//p/@id", "p:nth-child(2)", "i"] * 10
+    expected = [many.etree(needle, HTML_DOC, allow_mismatch=True) for needle in needles]
+    assert batch.etree_many_concurrent(needles, HTML_DOC, max_workers=4, allow_mismatch=True) == expected
+    assert batch.etree_many_concurrent(["//p/@id"], HTML_DOC, str.upper) == [["FIRST"]]
+    with pytest.raises(NotFound):
+        batch.etree_many_concurrent(needles, HTML_DOC, max_workers=4)
+
+
+@pytest.mark.parametrize(
+    "haystack, expected",
+    [
+        ("abc", 3),
+        (b"x" * 10_000, 1_000),
+        ({"a": [1, 2, {"b": 3}]}, 6 * NODE_SIZE),
+        ([[1] * 1_000_000], 1_000),
+        (HTML_DOC, 5 * NODE_SIZE),
+        (XML_DOC.find("*"), 2 * NODE_SIZE),
+        (iter([1]), 1_000),
+    ],
+)
+def test_estimate_size(haystack, expected):
+    assert estimate_size(haystack, 1_000) == expected
+
+
+@pytest.mark.parametrize("inline_size_limit", [aio.INLINE_SIZE_LIMIT, -1])
+def test_aio(inline_size_limit):
+    threads = []
+
+    def needle(value):
+        threads.append(threading.get_ident())
+        return value % 2
+
+    async def search():
+        return await asyncio.gather(
+            aio.one.re(r"b(.)", "abracadabra", allow_many=True),
+            aio.many.re(r"b(.)", "abracadabra"),
+            aio.one.etree("//p/b/text()", HTML_DOC, str.upper),
+            aio.many.etree("//p/@id", HTML_DOC),
+            aio.one.attrib("id", one.etree("p", HTML_DOC, allow_many=True)),
+            aio.one.pods("a.b", {"a": {"b": 1}}),
+            aio.many.pods("a[]", {"a": [1, 2]}, str),
+            aio.many.filter(needle, [1, 2, 3]),
+            aio.one.re(r"b(.)", "abracadabra"),
+            return_exceptions=True,
+        )
+
+    try:
+        aio.set_inline_size_limit(inline_size_limit)
+        results = asyncio.run(search())
+    finally:
+        aio.set_inline_size_limit(aio.INLINE_SIZE_LIMIT)
+    *results, error = results
+    assert results == ["r", ["r", "r"], "FORBAN", ["first"], "first", 1, ["1", "2"], [1, 3]]
+    assert isinstance(error, ManyFound)
+    assert (threads[0] == threading.get_ident()) == (inline_size_limit >= 0)
+
+
+def test_pods_array():
+    data = {"results": [{"price": 1.5, "count": 2}, {"price": 3, "count": 4}, {"count": 5}]}
+    prices = many.pods_array("results[].price", data)
+    assert isinstance(prices, array.array)
+    assert prices == array.array("d", [1.5, 3.0])
+    assert many.pods_array("results[].count", data, "q") == array.array("q", [2, 4, 5])
+    assert many.pods_array("results[].count", json.dumps(data).encode(), "q") == array.array("q", [2, 4, 5])
+    assert many.pods_array("results[].size", data, allow_mismatch=True) == array.array("d")
+    with pytest.raises(NotFound):
+        many.pods_array("results[].size", data)
+    with pytest.raises(TypeError):
+        many.pods_array("results[].price", data, "q")
+    columns = many.pods_arrays({"price": "results[].price", "count": "results[].count"}, data, {"price": "d", "count": "l"})
+    assert columns == {"price": prices, "count": array.array("l", [2, 4, 5])}
+    columns = many.pods_arrays({"price": "results[].price", "count": "results[].count"}, json.dumps(data).encode(), "d")
+    assert columns == {"price": prices, "count": array.array("d", [2, 4, 5])}
+    with pytest.raises(NotFound):
+        many.pods_arrays({"price": "results[].price", "size": "results[].size"}, data)
+
+
+def test_pods_array_numpy():
+    numpy = pytest.importorskip("numpy")
+    data = {"results": [{"price": 1.5}, {"price": 3}]}
+    prices = many.pods_array("results[].price", data, numpy.float32)
+    assert prices.dtype == numpy.float32
+    assert prices.tolist() == [1.5, 3.0]
+
+
+def test_one_allow_duplicates_with_unhashable_values():
+    haystack = {"a": [{"b": [1, 2]}, {"b": [1, 2]}, {"b": [1, 2]}]}
+    assert one.pods("a[]", haystack, allow_duplicates=True) == {"b": [1, 2]}
+    assert one.pods("a[].b", haystack, allow_duplicates=True) == [1, 2]
+    with pytest.raises(ManyFound):
+        one.pods("a[].b", {"a": [{"b": [1, 2]}, {"b": [2, 1]}]}, allow_duplicates=True)
+    element = one.etree("p b", HTML_DOC)
+    assert one.filter(lambda e: e.tag == "b", [element, element], allow_duplicates=True) is element
+    with pytest.raises(ManyFound):
+        one.filter(lambda e: e.tag == "p", HTML_DOC.iter(), allow_duplicates=True)
+    nan = float("nan")
+    assert one.filter(bool, [nan, nan], allow_duplicates=True) is nan
+
+
+def test_one_allow_duplicates_stops_at_second_distinct_value():
+    values = itertools.chain([{"a": 1}] * 3, [{"a": 2}], itertools.repeat({"a": 3}))
+    with pytest.raises(ManyFound):
+        one.filter(bool, values, allow_duplicates=True)
+    assert next(values) == {"a": 3}
+
+
+def test_instrumentation():
+    original = many.re
+    events = []
+    cache_clear()
+    with instrumentation.instrumented() as stats:
+        assert many.re is not original
+        instrumentation.add_listener(events.append)
+        try:
+            for _ in range(3):
+                assert one.re(r"b(.)", "abracadabra", allow_many=True) == "r"
+            assert many.pods("a[]", {"a": [1, 2]}) == [1, 2]
+            with pytest.raises(NotFound):
+                one.etree("i", HTML_DOC)
+            assert one.filter(bool, [0, 1]) == 1
+        finally:
+            instrumentation.remove_listener(events.append)
+    assert many.re is original
+    assert [(event.kind, event.needle, event.result_count, event.error, event.cache_hit) for event in events] == [
+        ("one.re", r"b(.)", 1, None, False),
+        ("one.re", r"b(.)", 1, None, True),
+        ("one.re", r"b(.)", 1, None, True),
+        ("many.pods", "a[]", 2, None, False),
+        ("one.etree", "i", 0, NotFound, False),
+        ("one.filter", bool, 1, None, None),
+    ]
+    assert events[0].haystack_size == len("abracadabra")
+    snapshot = stats.snapshot()
+    assert snapshot["one.re", r"b(.)"]["calls"] == 3
+    assert sum(snapshot["one.re", r"b(.)"]["histogram"].values()) == 3
+    assert (snapshot["one.re", r"b(.)"]["cache_hits"], snapshot["one.re", r"b(.)"]["cache_misses"]) == (2, 1)
+    assert snapshot["one.etree", "i"]["errors"] == 1
+    output = io.StringIO()
+    stats.dump(output)
+    assert len(output.getvalue().splitlines()) == 4
+    one.re(r"b(.)", "abracadabra", allow_many=True)
+    assert stats.snapshot()["one.re", r"b(.)"]["calls"] == 3
+
+
+def test_instrumentation_with_keyword_arguments():
+    events = []
+    with instrumentation.instrumented():
+        instrumentation.add_listener(events.append)
+        try:
+            assert one.re(needle=r"b(.)", haystack="abracadabra", allow_many=True) == "r"
+            assert many.pods("a[]", haystack={"a": [1, 2]}) == [1, 2]
+        finally:
+            instrumentation.remove_listener(events.append)
+    assert [(event.kind, event.needle, event.result_count) for event in events] == [("one.re", r"b(.)", 1), ("many.pods", "a[]", 2)]
+    assert events[0].haystack_size == len("abracadabra")
+    assert events[1].haystack_size > 0
+
+
+class CountingDict(dict):
+    lookups = 0
+
+    def __getitem__(self, key):
+        CountingDict.lookups += 1
+        return super().__getitem__(key)
+
+
+def test_pods_index():
+    needles = [
+        "payload.results[].id",
+        "payload.results[].tags[]",
+        "payload.results[2].nested.deep[][]",
+        "payload.results[].missing",
+        "payload.total",
+        "payload",
+        "[]",
+    ]
+    index = PodsIndex(JSON_DATA)
+    for _ in range(2):
+        for needle in needles:
+            assert many.pods(needle, index, allow_mismatch=True) == many.pods(needle, JSON_DATA, allow_mismatch=True)
+    assert one.pods("payload.total", index, type=int) == JSON_DATA["payload"]["total"]
+    with pytest.raises(ManyFound):
+        one.pods("payload.results[].id", index)
+    with pytest.raises(TypeError):
+        one.pods("payload.total", index, type=str)
+    assert extract({"total": "payload.total", "ids": Field("payload.results[].id", many=True)}, index) == extract(
+        {"total": "payload.total", "ids": Field("payload.results[].id", many=True)}, JSON_DATA
+    )
+
+
+def test_pods_index_resumes_from_shared_prefix():
+    haystack = {"a": CountingDict(b=[CountingDict(c=i, d=-i) for i in range(10)])}
+    index = PodsIndex(haystack)
+    assert many.pods("a.b[].c", index) == list(range(10))
+    CountingDict.lookups = 0
+    assert many.pods("a.b[].d", index) == [-i for i in range(10)]
+    assert CountingDict.lookups == 10  # only the "d" lookups, "a.b[]" was already indexed
+    assert many.pods("a.b[].d", index) == [-i for i in range(10)]
+    assert CountingDict.lookups == 10
+
+
+@pytest.mark.parametrize(
+    "needle, kind, expected_kind, expected_xpath",
+    [
+        ("p b", None, "css", "descendant-or-self::p/descendant::b"),
+        ("p/b", None, "xpath", ".//p/b"),
+        ("/p", None, "xpath", "./p"),
+        ("//p", None, "xpath", ".//p"),
+        ("./p", None, "xpath", "./p"),
+        ("@id", None, "xpath", ".//@id"),
+        ("p", "xpath", "xpath", ".//p"),
+        ("//p", "absolute_xpath", "absolute_xpath", "//p"),
+        ("p/b", "css", "css", SelectorError),
+        ("p", "jq", None, ValueError),
+    ],
+)
+def test_compiled_xpath_kind(needle, kind, expected_kind, expected_xpath):
+    if expected_xpath in (SelectorError, ValueError):
+        with pytest.raises(expected_xpath):
+            compile_xpath(needle, kind)
+    else:
+        query = compile_xpath(needle, kind)
+        assert (query.kind, query.xpath) == (expected_kind, expected_xpath)
+
+
+def test_etree_kind():
+    # "p" would be guessed to be CSS, which would also search the subtree
+    assert many.etree("p", HTML_DOC, kind="xpath") == many.etree("p", HTML_DOC)
+    # only an absolute XPath can search outside of the haystack's subtree
+    assert one.etree("b", FIRST_P, allow_many=True).text == "one has "
+    assert one.etree("//p[@id='two']/b/text()", FIRST_P, kind="absolute_xpath") == "two"
+    with pytest.raises(NotFound):
+        one.etree("//p[@id='two']/b/text()", FIRST_P)
+    assert list(poisk_iter.etree("//p/@id", FIRST_P, kind="absolute_xpath")) == ["one", "two"]
+    assert extract({"other": Field("../p[2]/@id", kind="absolute_xpath")}, FIRST_P) == {"other": "two"}
+    xpath.cache_clear()
+    one.etree("//p/@id", HTML_DOC, kind="absolute_xpath")
+    one.etree("//p/@id", HTML_DOC)
+    assert xpath.cache_info().currsize == 2
+
+
+LOCATIONS: Dict[str, Any] = {
+    "locations": [
+        {"name": "Seattle", "state": "WA", "population": 750_000, "address": {"zip": "98101"}},
+        {"name": "New York", "state": "NY", "population": 8_300_000},
+        {"name": "Bellevue", "state": "WA", "population": 150_000, "address": {"zip": None}},
+        {"name": "Olympia", "state": "WA", "population": "unknown"},
+        {"name": "Nowhere"},
+        "not a dict",
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    "needle, expected",
+    [
+        ("locations[?state == 'WA'].name", ["Seattle", "Bellevue", "Olympia"]),
+        ('locations[?state == "WA"].name', ["Seattle", "Bellevue", "Olympia"]),
+        ("locations[?state != 'WA'].name", ["New York"]),
+        ("locations[?population > 500000].name", ["Seattle", "New York"]),
+        ("locations[?population <= 750000].name", ["Seattle", "Bellevue"]),
+        ("locations[?population < 0].name", []),
+        ("locations[?population >= 'a'].name", ["Olympia"]),
+        ("locations[?address].name", ["Seattle", "Bellevue"]),
+        ("locations[?address.zip].name", ["Seattle", "Bellevue"]),
+        ("locations[?address.zip == null].name", ["Bellevue"]),
+        ("locations[?address.zip != null].address.zip", ["98101"]),
+        ("locations[?state == 'WA'][?population > 500000].name", []),
+        ("locations[?state == 'WA']", [LOCATIONS["locations"][i] for i in (0, 2, 3)]),
+        ("locations[?'state' == 'W\\'A']", []),
+        ("locations[0][?state]", []),
+    ],
+)
+def test_pods_filter(needle, expected):
+    assert many.pods(needle, LOCATIONS, allow_mismatch=True) == expected
+    assert many.pods(needle, json.dumps(LOCATIONS).encode("UTF-8"), allow_mismatch=True) == expected
+    assert many.pods(needle, PodsIndex(LOCATIONS), allow_mismatch=True) == expected
+    assert PodsQuerySet([needle, "locations[].name"]).search(LOCATIONS)[0] == expected
+
+
+FLAGS: Dict[str, Any] = {"items": [{"a": True}, {"a": False}, {"a": 1}, {"a": 0}, {"a": 1.0}, {"a": 0.0}]}
+
+
+@pytest.mark.parametrize(
+    "needle, expected",
+    [
+        ("items[?a == true].a", [True]),
+        ("items[?a == false].a", [False]),
+        ("items[?a != true].a", [False, 1, 0, 1.0, 0.0]),
+        ("items[?a == 1].a", [1, 1.0]),
+        ("items[?a == 0].a", [0, 0.0]),
+        ("items[?a != 0].a", [True, False, 1, 1.0]),
+        ("items[?a < 1].a", [0, 0.0]),
+        ("items[?a >= 0].a", [1, 0, 1.0, 0.0]),
+        ("items[?a > false].a", []),
+        ("items[?a <= true].a", []),
+    ],
+)
+def test_pods_filter_booleans(needle, expected):
+    assert many.pods(needle, FLAGS, allow_mismatch=True) == expected
+    assert many.pods(needle, json.dumps(FLAGS).encode("UTF-8"), allow_mismatch=True) == expected
+    assert many.pods(needle, PodsIndex(FLAGS), allow_mismatch=True) == expected
+
+
+@pytest.mark.parametrize(
+    "needle",
+    [
+        "locations[?]",
+        "locations[?state == ]",
+        "locations[?state === 'WA']",
+        "locations[?state == WA]",
+        "locations[?state == [1]]",
+        "locations[?[0] == 1]",
+    ],
+)
+def test_pods_filter_syntax_errors(needle):
+    with pytest.raises(ValueError):
+        compile_pods(needle)
+
+
+NESTED: Dict[str, Any] = {
+    "id": 0,
+    "payload": {
+        "a": [{"id": 1, "b": {"id": 2}}, {"c": [{"id": {"id": 3}}]}],
+        "rates": {"eur": {"amount": 1.0}, "usd": {"amount": 1.1}, "gbp": {}},
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "needle, expected",
+    [
+        ("..id", [0, 1, 2, {"id": 3}, 3]),
+        ("payload..id", [1, 2, {"id": 3}, 3]),
+        ("..id.id", [3]),
+        ("payload.a[]..id", [1, 2, {"id": 3}, 3]),
+        ("payload.a[1]..id..id", [3]),
+        ("payload..b.id", [2]),
+        ("payload.rates.*.amount", [1.0, 1.1]),
+        ("payload.*", [NESTED["payload"]["a"], NESTED["payload"]["rates"]]),
+        ("*.rates.*", [{"amount": 1.0}, {"amount": 1.1}, {}]),
+        ("payload.a.*", []),
+        ("..missing", []),
+        ("payload.rates..amount", [1.0, 1.1]),
+    ],
+)
+def test_pods_descendants_and_wildcards(needle, expected):
+    assert many.pods(needle, NESTED, allow_mismatch=True) == expected
+    assert many.pods(needle, json.dumps(NESTED).encode("UTF-8"), allow_mismatch=True) == expected
+    assert many.pods(needle, PodsIndex(NESTED), allow_mismatch=True) == expected
+    assert PodsQuerySet([needle, "payload..id"]).search(NESTED)[0] == expected
+
+
+def test_pods_index_key_index():
+    haystack = {"a": CountingDict(b=[CountingDict(id=i, c=CountingDict(id=-i)) for i in range(10)])}
+    index = PodsIndex(haystack)
+    assert many.pods("a..id", index) == [i * sign for i in range(10) for sign in (1, -1)]
+    CountingDict.lookups = 0
+    assert many.pods("a.b[]..id", index) == [i * sign for i in range(10) for sign in (1, -1)]
+    assert many.pods("a.b[].c..id", index) == [-i for i in range(10)]
+    assert many.pods("..c", index) == [{"id": -i} for i in range(10)]
+    assert CountingDict.lookups == 11  # "b" once and "c" ten times, none for the `..` steps
+
+
+@pytest.mark.parametrize("needle", ["a..[]", "a...b", "a..", "a.*b", "a..*"])
+def test_pods_descendants_syntax_errors(needle):
+    with pytest.raises(ValueError):
+        compile_pods(needle)
+
+
+class CountingList(list):
+    lookups = 0
+
+    def __getitem__(self, index):
+        CountingList.lookups += 1
+        return super().__getitem__(index)
+
+
+@pytest.mark.parametrize(
+    "needle, expected",
+    [
+        ("a[-1]", [9]),
+        ("a[-10]", [0]),
+        ("a[-11]", []),
+        ("a[2:4]", [2, 3]),
+        ("a[7:]", [7, 8, 9]),
+        ("a[:-8]", [0, 1]),
+        ("a[ -2 : ]", [8, 9]),
+        ("a[::4]", [0, 4, 8]),
+        ("a[::-4]", [9, 5, 1]),
+        ("a[8:2:-3]", [8, 5]),
+        ("a[20:]", []),
+        ("a[:]", list(range(10))),
+        ("b[-1].c[1:]", [4, 5]),
+        ("b[:].c[::2]", [0, 2, 3, 5]),
+        ("b.c[-1]", []),
+        ("c[0:1]", []),
+    ],
+)
+def test_pods_slices(needle, expected):
+    haystack = {"a": list(range(10)), "b": [{"c": [0, 1, 2]}, {"c": [3, 4, 5]}], "c": {"0": 1}}
+    assert many.pods(needle, haystack, allow_mismatch=True) == expected
+    assert many.pods(needle, json.dumps(haystack).encode("UTF-8"), allow_mismatch=True) == expected
+    assert many.pods(needle, PodsIndex(haystack), allow_mismatch=True) == expected
+    assert PodsQuerySet([needle, "a[]"]).search(haystack)[0] == expected
+
+
+@pytest.mark.parametrize(
+    "needle, expected",
+    [
+        ("s[0]", ["x"]),
+        ("s[-1]", ["z"]),
+        ("s[-4]", []),
+        ("s[1:]", ["y", "z"]),
+        ("s[::-1]", ["z", "y", "x"]),
+        ("s[]", []),
+        ("s[?a]", []),
+    ],
+)
+def test_pods_strings(needle, expected):
+    # indexes and slices select characters, as in Python, but strings aren't lists of them
+    haystack = {"s": "xyz"}
+    assert many.pods(needle, haystack, allow_mismatch=True) == expected
+    assert many.pods(needle, json.dumps(haystack).encode("UTF-8"), allow_mismatch=True) == expected
+    assert many.pods(needle, PodsIndex(haystack), allow_mismatch=True) == expected
+    assert [value for _, value in many.pods(needle, haystack, allow_mismatch=True, with_paths=True)] == expected
+    assert PodsQuerySet([needle, "s"]).search(haystack) == [expected, ["xyz"]]
+
+
+def test_pods_get_string_index():
+    assert pods_get(("s", -1), {"s": "xyz"}) == "z"
+    with pytest.raises(NotFound):
+        pods_get(("s", 3), {"s": "xyz"})
+
+
+def test_pods_slices_are_lazy():
+    haystack = {"a": CountingList(range(1000))}
+    CountingList.lookups = 0
+    with pytest.raises(ManyFound):
+        one.pods("a[10:]", haystack)
+    assert CountingList.lookups == 2
+    assert one.pods("a[-1]", haystack) == 999
+    assert CountingList.lookups == 3
+
+
+@pytest.mark.parametrize("needle", ["a[1:2:3:4]", "a[::0]", "a[1.5:]", "a[-]", "a..[1:]", "a[- 1]"])
+def test_pods_slices_syntax_errors(needle):
+    with pytest.raises(ValueError):
+        compile_pods(needle)
+
+
+class Location(TypedDict):
+    name: str
+    population: int
+
+
+class PartialLocation(TypedDict, total=False):
+    name: str
+    population: int
+
+
+@pytest.mark.parametrize(
+    "needle, type_spec, expected",
+    [
+        ("locations[0].population", int, [750_000]),
+        ("locations[].population", (int, str), [750_000, 8_300_000, 150_000, "unknown"]),
+        ("locations[].population", Union[int, str], [750_000, 8_300_000, 150_000, "unknown"]),
+        ("locations[?address].address.zip", Optional[str], ["98101", None]),
+        ("locations[?address].address", Dict[str, Optional[str]], [{"zip": "98101"}, {"zip": None}]),
+        ("locations[?address].address", Dict[str, Any], [{"zip": "98101"}, {"zip": None}]),
+        ("locations[:2]", Location, LOCATIONS["locations"][:2]),
+        ("locations", SequenceType[Union[Dict[str, Any], str]], [LOCATIONS["locations"]]),
+        ("locations", List[Any], [LOCATIONS["locations"]]),
+        ("locations[?name == 'Nowhere']", PartialLocation, [{"name": "Nowhere"}]),
+        ("locations[?state == 'NY'].name", Any, ["New York"]),
+    ],
+)
+def test_pods_type_specs(needle, type_spec, expected):
+    assert many.pods(needle, LOCATIONS, type=type_spec) == expected
+    assert many.pods(needle, json.dumps(LOCATIONS).encode("UTF-8"), type=type_spec) == expected
+    assert many.pods(needle, PodsIndex(LOCATIONS), type=type_spec) == expected
+
+
+@pytest.mark.parametrize(
+    "needle, type_spec, expected",
+    [
+        ("locations[0].name", int, [Mismatch(0, (), "int", "str")]),
+        ("locations[].population", int, [Mismatch(3, (), "int", "str")]),
+        (
+            "locations",
+            List[Location],
+            [
+                Mismatch(0, (3, "population"), "int", "str"),
+                Mismatch(0, (4, "population"), "int", "nothing"),
+                Mismatch(0, (5,), "Location", "str"),
+            ],
+        ),
+        (
+            "locations[0]",
+            Dict[str, Union[int, float, str]],
+            [Mismatch(0, ("address",), "int | float | str", "dict")],
+        ),
+        ("locations[0].address", Dict[int, str], [Mismatch(0, ("zip",), "key of type int", "str")]),
+        ("locations[0].name", Tuple[str, str], [Mismatch(0, (), "Tuple[str, str]", "str")]),
+    ],
+)
+def test_pods_type_spec_mismatches(needle, type_spec, expected):
+    with pytest.raises(ResultTypeError) as raised:
+        many.pods(needle, LOCATIONS, type=type_spec)
+    assert raised.value.mismatches == expected
+    assert isinstance(raised.value, TypeError)
+    assert pickle.loads(pickle.dumps(raised.value)).mismatches == expected
+
+
+def test_pods_type_spec_error_message():
+    with pytest.raises(ResultTypeError) as raised:
+        many.pods("locations", LOCATIONS, type=List[Location])
+    assert str(raised.value) == (
+        "3 mismatches with List[Location]: result 0 at [3].population: expected int, found str;"
+        " result 0 at [4].population: expected int, found nothing; result 0 at [5]: expected Location, found str"
+    )
+    with pytest.raises(ResultTypeError, match=r"^Expected int, found str$"):
+        one.pods("locations[0].name", LOCATIONS, type=int)
+
+
+def test_pods_type_spec_checks_results_as_they_are_found():
+    results = poisk_iter.pods("locations[].population", LOCATIONS, type=int)
+    assert [next(results) for _ in range(3)] == [750_000, 8_300_000, 150_000]
+    with pytest.raises(ResultTypeError) as raised:
+        next(results)
+    assert raised.value.mismatches == [Mismatch(3, (), "int", "str")]
+    with pytest.raises(ResultTypeError):
+        # a result of the wrong type isn't a mismatch of the needle
+        one.pods("locations[0].name", LOCATIONS, type=int, allow_mismatch=True)
+    # searches that can stop early raise at the first mismatch, rather than leaving it out
+    with pytest.raises(ResultTypeError, match=r"^Expected int, found str$"):
+        one.pods("a[]", {"a": ["x", 1]}, type=int, allow_many=True)
+    with pytest.raises(ResultTypeError, match=r"^Expected int, found str$"):
+        one.pods("a[]", {"a": ["x", 1, 2]}, type=int)
+    with pytest.raises(ResultTypeError):
+        one.pods("a[]", {"a": ["x", 1]}, type=int, allow_many=True, with_paths=True)
+
+
+def test_compile_type():
+    compile_type.cache_clear()
+    assert compile_type(List[int]) is compile_type(List[int])
+    assert compile_type.cache_info().hits == 1
+    assert compile_type((int, type(None))).matches(None)
+    assert not compile_type(List[int]).matches("12")
+    assert compile_type(Tuple[int, str]).matches((1, "a"))
+    assert not compile_type(Tuple[int, str]).matches((1, "a", "b"))
+    with pytest.raises(TypeError):
+        compile_type(3)
+    with pytest.raises(TypeError):
+        compile_type(Callable[[int], int])
+
+
+@pytest.mark.parametrize(
+    "needle, expected_paths",
+    [
+        ("locations[0].name", [("locations", 0, "name")]),
+        ("locations[-1]", [("locations", 5)]),
+        ("locations[-2:].name", [("locations", 4, "name")]),
+        ("locations[?address].address.zip", [("locations", 0, "address", "zip"), ("locations", 2, "address", "zip")]),
+        ("locations[0].*", [("locations", 0, key) for key in LOCATIONS["locations"][0]]),
+        ("..zip", [("locations", 0, "address", "zip"), ("locations", 2, "address", "zip")]),
+        ("locations[::2]..zip", [("locations", 0, "address", "zip"), ("locations", 2, "address", "zip")]),
+        ("locations[].missing", []),
+        ("", [()]),
+    ],
+)
+def test_pods_with_paths(needle, expected_paths):
+    results = many.pods(needle, LOCATIONS, with_paths=True, allow_mismatch=True)
+    assert [path for path, _ in results] == expected_paths
+    assert [value for _, value in results] == many.pods(needle, LOCATIONS, allow_mismatch=True)
+    for path, value in results:
+        assert pods_get(path, LOCATIONS) is value
+        assert pods_get(path, PodsIndex(LOCATIONS)) is value
+    assert many.pods(needle, json.dumps(LOCATIONS).encode("UTF-8"), with_paths=True, allow_mismatch=True) == results
+    assert many.pods(needle, PodsIndex(LOCATIONS), with_paths=True, allow_mismatch=True) == results
+    assert list(poisk_iter.pods(needle, LOCATIONS, with_paths=True, allow_mismatch=True)) == results
+
+
+def test_pods_with_paths_one_and_type():
+    assert one.pods("locations[1].name", LOCATIONS, with_paths=True) == (("locations", 1, "name"), "New York")
+    with pytest.raises(ManyFound):
+        one.pods("locations[].name", LOCATIONS, with_paths=True)
+    # duplicates are values found at several paths: the first path is returned
+    assert one.pods("a[]", {"a": [1, 1]}, allow_duplicates=True, with_paths=True) == (("a", 0), 1)
+    with pytest.raises(ManyFound):
+        one.pods("a[]", {"a": [1, 2]}, allow_duplicates=True, with_paths=True)
+    assert many.pods("locations[:2].population", LOCATIONS, type=int, with_paths=True) == [
+        (("locations", 0, "population"), 750_000),
+        (("locations", 1, "population"), 8_300_000),
+    ]
+    with pytest.raises(ResultTypeError) as raised:
+        many.pods("locations[].population", LOCATIONS, type=int, with_paths=True)
+    assert raised.value.mismatches == [Mismatch(3, (), "int", "str")]
+
+
+@pytest.mark.parametrize("search", [many.pods, one.pods, poisk_iter.pods])
+def test_pods_with_paths_and_parse(search):
+    with pytest.raises(TypeError, match="with_paths"):
+        search("locations[0].name", LOCATIONS, str.upper, with_paths=True)  # type: ignore[call-overload]
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        ("locations", 6),
+        ("locations", -7),
+        ("locations", "0"),
+        ("locations", 4, "population"),
+        ("locations", 0, "name", "x"),
+        ("missing",),
+    ],
+)
+def test_pods_get_not_found(path):
+    with pytest.raises(NotFound):
+        pods_get(path, LOCATIONS)